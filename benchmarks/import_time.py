@@ -0,0 +1,95 @@
+"""Import-time benchmark of the plugin library and the agent tools.
+
+    python benchmarks/import_time.py --json imports.json
+    python benchmarks/import_time.py --baseline imports.json --tolerance 0.3
+
+Each target is imported in a fresh interpreter, --repeat times, and the median is reported with the
+modules the import loaded. Runs in the plugin's code environment; dataiku is imported before the
+timer starts, so only the plugin's own imports are measured. Exits with status 1 when a target
+loads one of the heavy modules reserved for the code paths that need them, or when its median
+import time grows by more than the tolerance over the baseline.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PLUGIN_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hubspot")
+TOOLS = ["get-schemas", "get-user-details", "list-associations", "list-objects", "list-properties", "search-objects"]
+
+# Only loaded by the column output (pandas) and by ainvoke (aiohttp)
+HEAVY_MODULES = ["pandas", "numpy", "aiohttp"]
+
+PROBE = """
+import importlib.util, json, sys, time
+sys.path.insert(0, {lib!r})
+import dataiku.llm.agent_tools
+before = set(sys.modules)
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+loaded = sorted(name for name in set(sys.modules) - before if "." not in name)
+print(json.dumps({{"ms": 1000 * elapsed, "loaded": loaded}}))
+"""
+
+TOOL_STATEMENT = """spec = importlib.util.spec_from_file_location("tool", {path!r})
+spec.loader.exec_module(importlib.util.module_from_spec(spec))"""
+
+
+def targets():
+    yield "hubspot", "import hubspot"
+    for tool in TOOLS:
+        path = os.path.join(PLUGIN_DIR, "python-agent-tools", tool, "tool.py")
+        yield f"tool:{tool}", TOOL_STATEMENT.format(path=path)
+
+
+def measure(statement, repeat):
+    code = PROBE.format(lib=os.path.join(PLUGIN_DIR, "python-lib"), statement=statement)
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, "-c", code], universal_newlines=True)
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "ms": round(statistics.median(run["ms"] for run in runs), 2),
+        "loaded": runs[-1]["loaded"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark of the HubSpot plugin")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per target")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Results file of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    results, problems = {}, []
+    print(f"{'target':<28}{'median ms':>10}  heavy modules")
+    for name, statement in targets():
+        result = results[name] = measure(statement, args.repeat)
+        heavy = [module for module in HEAVY_MODULES if module in result["loaded"]]
+        print(f"{name:<28}{result['ms']:>10}  {', '.join(heavy) or '-'}")
+        if heavy:
+            problems.append(f"{name} imports {', '.join(heavy)}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for name, result in results.items():
+            previous = baseline.get(name)
+            if previous and result["ms"] > previous["ms"] * (1 + args.tolerance):
+                problems.append(f"{name}: {result['ms']}ms > baseline {previous['ms']}ms")
+
+    for problem in problems:
+        print("REGRESSION " + problem)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,384 @@
+"""Local stand-in for the HubSpot endpoints used by the plugin, serving a synthetic portal.
+
+Emulates v1 contacts / v2 companies paging, the v3 objects, search, batch/read, properties,
+schemas, owners and pipelines endpoints, v4 associations, the token and account info
+endpoints, the X-HubSpot-RateLimit-* headers with 429s, and injected latency.
+
+    python benchmarks/mock_server.py --contacts 20000 --width 50 --latency-ms 20
+
+The first line printed is the base URL to export as HUBSPOT_API_HOST.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlparse
+
+EPOCH_MILLIS = 1600000000000
+DEFAULT_PROPERTIES = {
+    "contacts": ["firstname", "lastname", "email"],
+    "companies": ["name", "domain"],
+    "deals": ["dealname", "amount", "pipeline", "dealstage"]
+}
+OWNERS = 25
+STAGES = ["appointmentscheduled", "qualifiedtobuy", "closedwon", "closedlost"]
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class SyntheticPortal(object):
+    """Deterministic records for contacts, companies and deals, generated on demand."""
+
+    def __init__(self, sizes, width):
+        self.sizes = sizes
+        self.width = width
+        self._records = {}
+
+    def property_names(self, object_type):
+        return DEFAULT_PROPERTIES[object_type] + [
+            "hubspot_owner_id", "createdate", "lastmodifieddate"
+        ] + [f"custom_{i}" for i in range(self.width)]
+
+    def record(self, object_type, index):
+        key = (object_type, index)
+        record = self._records.get(key)
+        if record is None:
+            record = self._records[key] = self._generate(object_type, index)
+        return record
+
+    def _generate(self, object_type, index):
+        rng = random.Random(f"{object_type}-{index}")
+        created = EPOCH_MILLIS + index * 60000
+        properties = {
+            "hubspot_owner_id": str(1 + index % OWNERS),
+            "createdate": str(created),
+            "lastmodifieddate": str(created + rng.randint(0, 10 ** 9))
+        }
+        if object_type == "contacts":
+            properties.update(firstname=f"First{index}", lastname=f"Last{index % 997}",
+                              email=f"contact{index}@example{index % 50}.com")
+        elif object_type == "companies":
+            properties.update(name=f"Company {index}", domain=f"company{index}.example.com")
+        else:
+            properties.update(dealname=f"Deal {index}", amount=str(rng.randint(100, 100000)),
+                              pipeline="default", dealstage=STAGES[index % len(STAGES)])
+        for i in range(self.width):
+            properties[f"custom_{i}"] = f"value {rng.randint(0, 1000)} of custom property {i}"
+        return properties
+
+    def ids(self, object_type):
+        return range(1, self.sizes.get(object_type, 0) + 1)
+
+
+class RateWindow(object):
+    """Fixed window rate limit per token, reported through the X-HubSpot-RateLimit-* headers."""
+
+    def __init__(self, limit, interval_ms):
+        self.limit = limit
+        self.interval_ms = interval_ms
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def take(self, token):
+        with self._lock:
+            window = int(time.time() * 1000) // self.interval_ms
+            start, used = self._windows.get(token, (window, 0))
+            if start != window:
+                used = 0
+            used += 1
+            self._windows[token] = (window, used)
+            return self.limit - used
+
+    def retry_after(self):
+        # Whole seconds until the current window ends
+        return int(self.interval_ms - int(time.time() * 1000) % self.interval_ms) // 1000 + 1
+
+
+def _v3(object_type, record_id, properties, names):
+    return {
+        "id": str(record_id),
+        "properties": {name: properties.get(name) for name in names},
+        "createdAt": _iso(properties["createdate"]),
+        "updatedAt": _iso(properties["lastmodifieddate"]),
+        "archived": False
+    }
+
+
+def _iso(millis):
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(int(millis) / 1000))
+
+
+def _matches(properties, f):
+    value = properties.get(f["propertyName"])
+    operator = f["operator"]
+    if operator == "HAS_PROPERTY":
+        return value is not None
+    if operator == "NOT_HAS_PROPERTY":
+        return value is None
+    if value is None:
+        return operator in ("NEQ", "NOT_IN", "NOT_CONTAINS_TOKEN")
+    operand = f.get("value")
+    if operator in ("IN", "NOT_IN"):
+        found = str(value).lower() in [str(v).lower() for v in f.get("values", [])]
+        return found if operator == "IN" else not found
+    if operator in ("CONTAINS_TOKEN", "NOT_CONTAINS_TOKEN"):
+        found = str(operand).strip("*").lower() in str(value).lower()
+        return found if operator == "CONTAINS_TOKEN" else not found
+    try:
+        value, operand = float(value), float(operand)
+        high = float(f.get("highValue", 0))
+    except (TypeError, ValueError):
+        value, operand, high = str(value).lower(), str(operand).lower(), str(f.get("highValue", "")).lower()
+    return {
+        "EQ": lambda: value == operand,
+        "NEQ": lambda: value != operand,
+        "LT": lambda: value < operand,
+        "LTE": lambda: value <= operand,
+        "GT": lambda: value > operand,
+        "GTE": lambda: value >= operand,
+        "BETWEEN": lambda: operand <= value <= high
+    }[operator]()
+
+
+def make_handler(portal, rate, latency_ms, latency_per_record_ms):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _token(self, query):
+            auth = self.headers.get("Authorization", "")
+            return auth[len("Bearer "):] if auth.startswith("Bearer ") else query.get("hapikey", [""])[0]
+
+        def _send(self, status, body, records=0):
+            # Latency grows with the number of records, with +/-20% jitter
+            delay = (latency_ms + latency_per_record_ms * records) / 1000.0
+            time.sleep(delay * random.uniform(0.8, 1.2))
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in self._rate_headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _handle(self, method):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+            remaining = rate.take(self._token(query))
+            self._rate_headers = {
+                "X-HubSpot-RateLimit-Max": str(rate.limit),
+                "X-HubSpot-RateLimit-Remaining": str(max(0, remaining)),
+                "X-HubSpot-RateLimit-Interval-Milliseconds": str(rate.interval_ms)
+            }
+            if remaining < 0:
+                self._rate_headers["Retry-After"] = str(rate.retry_after())
+                return self._send(429, {"status": "error", "category": "RATE_LIMITS"})
+
+            for pattern, route_method, route in ROUTES:
+                match = re.match(pattern + "$", url.path)
+                if match and route_method == method:
+                    status, payload, records = route(self, query, body, *match.groups())
+                    return self._send(status, payload, records)
+            self._send(404, {"status": "error", "message": f"No route for {method} {url.path}"})
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        # Legacy export endpoints
+
+        def legacy_properties(self, query, body, object_type):
+            return 200, [{"name": name} for name in portal.property_names(object_type)], 0
+
+        def _legacy_page(self, object_type, query, offset_param, property_param):
+            count = min(int(query.get("count", ["20"])[0]), 100 if object_type == "contacts" else 250)
+            offset = int(query.get(offset_param, ["0"])[0])
+            names = query.get(property_param) or DEFAULT_PROPERTIES[object_type]
+            ids = [i for i in portal.ids(object_type) if i > offset][:count]
+            records = []
+            for record_id in ids:
+                properties = portal.record(object_type, record_id)
+                values = {
+                    name: {"value": properties[name], "timestamp": int(properties["lastmodifieddate"]), "source": "API"}
+                    for name in names if name in properties
+                }
+                values["lastmodifieddate"] = {"value": properties["lastmodifieddate"]}
+                if object_type == "contacts":
+                    records.append({"vid": record_id, "addedAt": int(properties["createdate"]), "properties": values})
+                else:
+                    records.append({"companyId": record_id, "portalId": 1, "isDeleted": False, "properties": values})
+            last = ids[-1] if ids else offset
+            has_more = bool(ids) and last < len(portal.ids(object_type))
+            return records, has_more, last
+
+        def contacts_all(self, query, body):
+            records, has_more, last = self._legacy_page("contacts", query, "vidOffset", "property")
+            return 200, {"contacts": records, "has-more": has_more, "vid-offset": last}, len(records)
+
+        def companies_paged(self, query, body):
+            records, has_more, last = self._legacy_page("companies", query, "offset", "properties")
+            return 200, {"companies": records, "has-more": has_more, "offset": last}, len(records)
+
+        # CRM v3 endpoints
+
+        def _names(self, object_type, requested):
+            return requested or DEFAULT_PROPERTIES.get(object_type, [])
+
+        def objects_list(self, query, body, object_type):
+            if object_type not in DEFAULT_PROPERTIES:
+                return 404, {"status": "error", "message": f"Unknown object type {object_type}"}, 0
+            limit = min(int(query.get("limit", ["10"])[0]), 100)
+            after = int(query.get("after", ["0"])[0])
+            names = self._names(object_type, ",".join(query.get("properties", [])).split(",") if "properties" in query else None)
+            ids = [i for i in portal.ids(object_type) if i > after][:limit]
+            results = [_v3(object_type, i, portal.record(object_type, i), names) for i in ids]
+            payload = {"results": results}
+            if ids and ids[-1] < len(portal.ids(object_type)):
+                payload["paging"] = {"next": {"after": str(ids[-1])}}
+            return 200, payload, len(results)
+
+        def objects_search(self, query, body, object_type):
+            if object_type not in DEFAULT_PROPERTIES:
+                return 404, {"status": "error", "message": f"Unknown object type {object_type}"}, 0
+            limit = min(int(body.get("limit", 10)), 200)
+            after = int(body.get("after") or 0)
+            names = self._names(object_type, body.get("properties"))
+            text = (body.get("query") or "").lower()
+            groups = body.get("filterGroups") or []
+            matched = []
+            for record_id in portal.ids(object_type):
+                properties = portal.record(object_type, record_id)
+                if text and not any(text in str(properties.get(n, "")).lower() for n in DEFAULT_PROPERTIES[object_type]):
+                    continue
+                if groups and not any(all(_matches(properties, f) for f in g.get("filters", [])) for g in groups):
+                    continue
+                matched.append(record_id)
+            for sort in reversed(body.get("sorts") or []):
+                matched.sort(key=lambda i: str(portal.record(object_type, i).get(sort["propertyName"], "")),
+                             reverse=sort.get("direction") == "DESCENDING")
+            page = matched[after:after + limit]
+            payload = {"total": len(matched), "results": [_v3(object_type, i, portal.record(object_type, i), names) for i in page]}
+            if after + limit < len(matched):
+                payload["paging"] = {"next": {"after": str(after + limit)}}
+            return 200, payload, len(page)
+
+        def objects_batch_read(self, query, body, object_type):
+            names = self._names(object_type, body.get("properties"))
+            results = [
+                _v3(object_type, int(i["id"]), portal.record(object_type, int(i["id"])), names)
+                for i in body.get("inputs", [])
+                if i["id"].isdigit() and int(i["id"]) in portal.ids(object_type)
+            ]
+            return 200, {"status": "COMPLETE", "results": results}, len(results)
+
+        def properties(self, query, body, object_type):
+            results = [
+                {"name": name, "label": name.replace("_", " ").title(), "type": "string",
+                 "fieldType": "text", "description": f"Synthetic property {name}", "groupName": f"{object_type}information"}
+                for name in portal.property_names(object_type)
+            ]
+            return 200, {"results": results}, len(results)
+
+        def schemas(self, query, body):
+            return 200, {"results": [{"name": "pets", "objectTypeId": "2-1", "fullyQualifiedName": "p1_pets"}]}, 0
+
+        def owners(self, query, body):
+            results = [{"id": str(i), "userId": i, "email": f"owner{i}@example.com",
+                        "firstName": f"Owner{i}", "lastName": "Synthetic"} for i in range(1, OWNERS + 1)]
+            return 200, {"results": results}, len(results)
+
+        def owner(self, query, body, owner_id):
+            return 200, {"id": owner_id, "userId": int(owner_id), "email": f"owner{owner_id}@example.com"}, 1
+
+        def pipelines(self, query, body, object_type):
+            stages = [{"id": stage, "label": stage.title()} for stage in STAGES]
+            return 200, {"results": [{"id": "default", "label": "Sales Pipeline", "stages": stages}]}, 0
+
+        # CRM v4 associations: contact i belongs to company 1 + i % companies
+
+        def associations(self, query, body, from_type, object_id, to_type):
+            object_id = int(object_id)
+            if from_type == "contacts" and to_type == "companies":
+                ids = [1 + object_id % max(1, portal.sizes.get("companies", 1))]
+            elif from_type == "companies" and to_type == "contacts":
+                step = max(1, portal.sizes.get("companies", 1))
+                ids = [i for i in range(1 + (object_id - 1) % step, portal.sizes.get("contacts", 0) + 1, step)]
+            else:
+                ids = [1 + (object_id * 7 + k) % max(1, portal.sizes.get(to_type, 1)) for k in range(3)]
+            limit = int(query.get("limit", ["500"])[0])
+            after = int(query.get("after", ["0"])[0])
+            page = ids[after:after + limit]
+            payload = {"results": [
+                {"toObjectId": i, "associationTypes": [{"category": "HUBSPOT_DEFINED", "typeId": 1, "label": None}]}
+                for i in page
+            ]}
+            if after + limit < len(ids):
+                payload["paging"] = {"next": {"after": str(after + limit)}}
+            return 200, payload, len(page)
+
+        def token_info(self, query, body):
+            return 200, {"userId": 1, "hubId": 1, "appId": 1, "scopes": ["crm.objects.contacts.read"]}, 0
+
+        def account_info(self, query, body):
+            return 200, {"portalId": 1, "timeZone": "UTC", "companyCurrency": "USD"}, 0
+
+    return Handler
+
+
+ROUTES = [
+    (r"/properties/v1/(\w+)/properties", "GET", lambda h, *a: h.legacy_properties(*a)),
+    (r"/contacts/v1/lists/all/contacts/all", "GET", lambda h, *a: h.contacts_all(*a)),
+    (r"/companies/v2/companies/paged", "GET", lambda h, *a: h.companies_paged(*a)),
+    (r"/crm/v3/objects/(\w+)", "GET", lambda h, *a: h.objects_list(*a)),
+    (r"/crm/v3/objects/(\w+)/search", "POST", lambda h, *a: h.objects_search(*a)),
+    (r"/crm/v3/objects/(\w+)/batch/read", "POST", lambda h, *a: h.objects_batch_read(*a)),
+    (r"/crm/v3/properties/(\w+)", "GET", lambda h, *a: h.properties(*a)),
+    (r"/crm/v3/schemas", "GET", lambda h, *a: h.schemas(*a)),
+    (r"/crm/v3/owners/?", "GET", lambda h, *a: h.owners(*a)),
+    (r"/crm/v3/owners/(\d+)", "GET", lambda h, *a: h.owner(*a)),
+    (r"/crm/v3/pipelines/(\w+)", "GET", lambda h, *a: h.pipelines(*a)),
+    (r"/crm/v4/objects/(\w+)/(\d+)/associations/(\w+)", "GET", lambda h, *a: h.associations(*a)),
+    (r"/oauth/v2/private-apps/get/access-token-info", "POST", lambda h, *a: h.token_info(*a)),
+    (r"/account-info/v3/details", "GET", lambda h, *a: h.account_info(*a)),
+]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Local HubSpot stand-in serving a synthetic portal")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--contacts", type=int, default=5000)
+    parser.add_argument("--companies", type=int, default=1000)
+    parser.add_argument("--deals", type=int, default=1000)
+    parser.add_argument("--width", type=int, default=20, help="Custom properties per record")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Base latency of every response")
+    parser.add_argument("--latency-per-record-ms", type=float, default=0.05)
+    parser.add_argument("--rate-limit", type=int, default=100, help="Requests per token per interval")
+    parser.add_argument("--rate-interval-ms", type=int, default=10000)
+    return parser
+
+
+def serve(args):
+    portal = SyntheticPortal({"contacts": args.contacts, "companies": args.companies, "deals": args.deals}, args.width)
+    rate = RateWindow(args.rate_limit, args.rate_interval_ms)
+    handler = make_handler(portal, rate, args.latency_ms, args.latency_per_record_ms)
+    return ThreadingHTTPServer(("127.0.0.1", args.port), handler)
+
+
+if __name__ == "__main__":
+    server = serve(build_parser().parse_args())
+    print(f"http://127.0.0.1:{server.server_port}", flush=True)
+    server.serve_forever()
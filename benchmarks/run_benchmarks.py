@@ -0,0 +1,374 @@
+"""Offline benchmarks of the export path and the agent tools, run against the local HubSpot stand-in.
+
+    python benchmarks/run_benchmarks.py --contacts 20000 --width 50 --json results.json
+    python benchmarks/run_benchmarks.py --baseline results.json --tolerance 0.15
+
+Runs in the plugin's code environment (dataiku, pandas, requests, aiohttp). Each scenario reports
+throughput (records or calls per second), p50/p99 latency (per page or per call) and peak Python
+memory. With --baseline, exits with status 1 when a scenario's throughput drops, or its p99
+latency grows, by more than the tolerance.
+"""
+import asyncio
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_DIR = os.path.join(os.path.dirname(BENCHMARKS_DIR), "hubspot")
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from mock_server import build_parser  # noqa: E402
+
+API_KEY = "benchmark-token"
+
+
+def percentile(values, fraction):
+    # Nearest-rank percentile
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+class _SinkWriter(object):
+    def __init__(self, dataset):
+        self.dataset = dataset
+
+    def write_row_array(self, row):
+        self.dataset.rows += 1
+
+    def close(self):
+        pass
+
+
+class SinkDataset(object):
+    """Stands in for the output dataset so writers run without a DSS instance."""
+
+    def __init__(self):
+        self.rows = 0
+
+    def write_schema(self, schema):
+        pass
+
+    def get_writer(self):
+        return _SinkWriter(self)
+
+    def write_with_schema(self, frame):
+        self.rows += len(frame)
+
+
+def start_mock_server(args):
+    command = [sys.executable, os.path.join(BENCHMARKS_DIR, "mock_server.py")]
+    for name in ("contacts", "companies", "deals", "width", "latency_ms", "latency_per_record_ms",
+                 "rate_limit", "rate_interval_ms"):
+        command += ["--" + name.replace("_", "-"), str(getattr(args, name))]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, universal_newlines=True)
+    return server, server.stdout.readline().strip()
+
+
+def load_tool(name):
+    from dataiku.llm.agent_tools import BaseAgentTool
+
+    path = os.path.join(PLUGIN_DIR, "python-agent-tools", name, "tool.py")
+    spec = importlib.util.spec_from_file_location(f"benchmark_{name.replace('-', '_')}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    tool_class = next(
+        value for value in vars(module).values()
+        if isinstance(value, type) and issubclass(value, BaseAgentTool) and value.__module__ == module.__name__
+    )
+    tool = tool_class()
+    tool.set_config({"hubspot_api_connection": API_KEY}, {})
+    return tool
+
+
+# Each scenario sets up untimed and returns the timed work, which returns (units, latencies).
+# Export scenarios count records and time pages
+
+def timed_pages(pages, latencies):
+    # Records how long each page took to arrive, excluding the time spent writing it
+    started = time.perf_counter()
+    for page in pages:
+        latencies.append(time.perf_counter() - started)
+        yield page
+        started = time.perf_counter()
+
+
+def export_json(**options):
+    from hubspot import get_values, write_data_json
+
+    def work():
+        dataset = SinkDataset()
+        writer = dataset.get_writer()
+        latencies = []
+        for page in timed_pages(get_values(API_KEY, "All", None, "contacts", **options), latencies):
+            write_data_json(writer, page, dataset, "JSON")
+        writer.close()
+        return dataset.rows, latencies
+    return work
+
+
+def export_contacts_json(args):
+    return export_json()
+
+
+def export_contacts_adaptive(args):
+    from hubspot.adaptive import AdaptiveController
+    from hubspot.metrics import RunMetrics
+
+    return export_json(controller=AdaptiveController(max_concurrency=1), metrics=RunMetrics())
+
+
+def export_companies_columns(args):
+    from hubspot import get_values, write_data_columns
+
+    def work():
+        dataset = SinkDataset()
+        latencies = []
+        for page in timed_pages(get_values(API_KEY, "Standard", None, "companies"), latencies):
+            write_data_columns(page, dataset, "Readable with columns")
+        return dataset.rows, latencies
+    return work
+
+
+def export_orchestrated(args):
+    from hubspot import get_values, write_data_tagged
+    from hubspot.adaptive import AdaptiveController
+    from hubspot.scheduler import ExportScheduler, RateBudget
+
+    def work():
+        dataset = SinkDataset()
+        writer = dataset.get_writer()
+        scheduler = ExportScheduler(4)
+        limiter, controller = RateBudget(), AdaptiveController(4)
+        for priority, object_name in enumerate(("contacts", "companies")):
+            pages = get_values(API_KEY, "Standard", None, object_name, limiter, controller)
+            scheduler.add(object_name, pages, priority, controller)
+        latencies = []
+        for object_name, page in timed_pages(scheduler.run(), latencies):
+            write_data_tagged(writer, page, 0, object_name)
+        writer.close()
+        return dataset.rows, latencies
+    return work
+
+
+# Tool scenarios count and time calls; the shared cache is cleared before each call
+
+def call_tool(tool, inputs):
+    from hubspot.cache import get_shared_cache
+
+    def work():
+        latencies = []
+        for tool_input in inputs:
+            get_shared_cache().invalidate()
+            started = time.perf_counter()
+            result = tool.invoke({"input": tool_input}, None)
+            latencies.append(time.perf_counter() - started)
+            if result.get("isError"):
+                raise Exception(f"Tool call failed: {result['output']}")
+        return len(inputs), latencies
+    return work
+
+
+def tool_search_objects(args):
+    return call_tool(load_tool("search-objects"), [
+        {"objectType": "contacts", "limit": 100, "properties": ["email", "hubspot_owner_id"],
+         "filterGroups": [{"filters": [{"propertyName": "lastname", "operator": "EQ", "value": f"Last{i}"}]}]}
+        for i in range(args.iterations)
+    ])
+
+
+def tool_search_objects_batch(args):
+    return call_tool(load_tool("search-objects"), [
+        {"objectType": "deals", "searches": [
+            {"id": stage, "properties": ["dealname", "dealstage", "hubspot_owner_id"], "limit": 20, "after": str(i),
+             "resolveLabels": True,
+             "filterGroups": [{"filters": [{"propertyName": "dealstage", "operator": "EQ", "value": stage}]}]}
+            for stage in ("closedwon", "closedlost", "qualifiedtobuy")
+        ]}
+        for i in range(args.iterations)
+    ])
+
+
+def tool_list_objects(args):
+    return call_tool(load_tool("list-objects"), [
+        {"objectType": "contacts", "limit": 100, "after": str(i * 100 % max(1, args.contacts))}
+        for i in range(args.iterations)
+    ])
+
+
+def tool_list_objects_ids(args):
+    return call_tool(load_tool("list-objects"), [
+        {"objectType": "contacts", "ids": [str(1 + (i * 250 + k) % max(1, args.contacts)) for k in range(250)]}
+        for i in range(args.iterations)
+    ])
+
+
+def tool_list_properties(args):
+    return call_tool(load_tool("list-properties"), [
+        {"objectType": ("contacts", "companies", "deals")[i % 3]} for i in range(args.iterations)
+    ])
+
+
+def tool_list_associations(args):
+    return call_tool(load_tool("list-associations"), [
+        {"objectType": "companies", "objectId": str(1 + i), "toObjectType": "contacts"}
+        for i in range(args.iterations)
+    ])
+
+
+def call_fresh_tools(calls):
+    def work():
+        latencies = []
+        for call in calls:
+            latencies.extend(call()[1])
+        return len(latencies), latencies
+    return work
+
+
+def tool_get_schemas(args):
+    import hubspot.schemas
+
+    # A fresh registry per call, since schemas are kept process-wide per portal for their TTL
+    calls = []
+    for _ in range(args.iterations):
+        hubspot.schemas._registries.clear()
+        calls.append(call_tool(load_tool("get-schemas"), [{}]))
+    return call_fresh_tools(calls)
+
+
+def tool_get_user_details(args):
+    # A fresh tool per call, since details are kept for the lifetime of a tool
+    return call_fresh_tools([call_tool(load_tool("get-user-details"), [{}]) for _ in range(args.iterations)])
+
+
+def tool_search_objects_async(args):
+    from hubspot.aio import close_async_sessions
+    from hubspot.cache import get_shared_cache
+
+    tool = load_tool("search-objects")
+
+    async def call(i):
+        started = time.perf_counter()
+        result = await tool.ainvoke({"input": {
+            "objectType": "contacts", "limit": 100,
+            "filterGroups": [{"filters": [{"propertyName": "lastname", "operator": "EQ", "value": f"Last{i}"}]}]
+        }}, None)
+        if result.get("isError"):
+            raise Exception(f"Tool call failed: {result['output']}")
+        return time.perf_counter() - started
+
+    async def main():
+        latencies = await asyncio.gather(*[call(i) for i in range(args.iterations)])
+        await close_async_sessions()
+        return latencies
+
+    def work():
+        get_shared_cache().invalidate()
+        latencies = asyncio.get_event_loop().run_until_complete(main())
+        return len(latencies), list(latencies)
+    return work
+
+
+SCENARIOS = [
+    ("export-contacts-json", "records", export_contacts_json),
+    ("export-contacts-adaptive", "records", export_contacts_adaptive),
+    ("export-companies-columns", "records", export_companies_columns),
+    ("export-orchestrated", "records", export_orchestrated),
+    ("tool-search-objects", "calls", tool_search_objects),
+    ("tool-search-objects-batch", "calls", tool_search_objects_batch),
+    ("tool-search-objects-async", "calls", tool_search_objects_async),
+    ("tool-list-objects", "calls", tool_list_objects),
+    ("tool-list-objects-ids", "calls", tool_list_objects_ids),
+    ("tool-list-properties", "calls", tool_list_properties),
+    ("tool-list-associations", "calls", tool_list_associations),
+    ("tool-get-schemas", "calls", tool_get_schemas),
+    ("tool-get-user-details", "calls", tool_get_user_details),
+]
+
+
+def run_scenario(scenario, args):
+    work = scenario(args)
+    tracemalloc.start()
+    started = time.perf_counter()
+    units, latencies = work()
+    duration = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    p50, p99 = percentile(latencies, 0.5), percentile(latencies, 0.99)
+    return {
+        "units": units,
+        "seconds": round(duration, 3),
+        "throughput": round(units / duration, 2) if duration else None,
+        "p50Ms": round(1000 * p50, 2) if p50 is not None else None,
+        "p99Ms": round(1000 * p99, 2) if p99 is not None else None,
+        "peakMemoryMb": round(peak / 2.0 ** 20, 2)
+    }
+
+
+def regressions(results, baseline, tolerance):
+    found = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous or "error" in result or "error" in previous:
+            continue
+        if previous.get("throughput") and result["throughput"] < previous["throughput"] * (1 - tolerance):
+            found.append(f"{name}: throughput {result['throughput']} < baseline {previous['throughput']}")
+        if previous.get("p99Ms") and result["p99Ms"] and result["p99Ms"] > previous["p99Ms"] * (1 + tolerance):
+            found.append(f"{name}: p99 {result['p99Ms']}ms > baseline {previous['p99Ms']}ms")
+    return found
+
+
+def main():
+    parser = build_parser()
+    parser.description = "Offline benchmarks of the HubSpot plugin against a local stand-in server"
+    parser.set_defaults(rate_limit=100000)
+    parser.add_argument("--iterations", type=int, default=20, help="Calls per tool scenario")
+    parser.add_argument("--only", nargs="*", help="Scenario names to run (default: all)")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Results file of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    server, url = start_mock_server(args)
+    # Must be set before the plugin library is imported
+    os.environ["HUBSPOT_API_HOST"] = url
+    sys.path.insert(0, os.path.join(PLUGIN_DIR, "python-lib"))
+
+    results = {}
+    try:
+        print(f"{'scenario':<28}{'units':>8}{'seconds':>10}{'per sec':>11}{'p50 ms':>10}{'p99 ms':>10}{'peak MB':>10}")
+        for name, unit, scenario in SCENARIOS:
+            if args.only and name not in args.only:
+                continue
+            try:
+                result = results[name] = run_scenario(scenario, args)
+            except Exception as e:
+                results[name] = {"error": str(e)}
+                print(f"{name:<28} failed: {e}")
+                continue
+            print(f"{name:<28}{result['units']:>8}{result['seconds']:>10}{result['throughput']:>11}"
+                  f"{result['p50Ms']:>10}{result['p99Ms']:>10}{result['peakMemoryMb']:>10}")
+    finally:
+        server.terminate()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    failed = [name for name, result in results.items() if "error" in result]
+    found = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for regression in found:
+            print("REGRESSION " + regression)
+    return 1 if failed or found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import dataiku
+import logging
+from dataiku.customrecipe import get_output_names_for_role, get_recipe_config
+from hubspot import write_data_tagged, get_values, get_owners
+from hubspot.dimensions import Dimensions
+from hubspot.constants import Constants
+from hubspot.adaptive import AdaptiveController
+from hubspot.metrics import RunMetrics
+from hubspot.scheduler import ExportScheduler, RateBudget
+
+logger = logging.getLogger(__name__)
+
+output_names = get_output_names_for_role('output')
+output_name = output_names[0]
+output = dataiku.Dataset(output_name)
+
+config = get_recipe_config()
+api_keys = [config['hapikey']] + [key for key in config.get('additional_hapikeys') or [] if key]
+object_names = config['object_names']
+priorities = config.get('object_priorities') or {}
+properties_type = config['properties_to_retrieve']
+list_input = config.get('custom_properties_list')
+enrich_labels = config.get('enrich_labels')
+
+# Every export of a portal draws from the same budget, so concurrent exports don't trigger 429s;
+# within max_workers, each portal's concurrency and page sizes adapt to its latency, 429s and timeouts
+max_workers = config.get('max_workers') or Constants.EXPORT_MAX_WORKERS
+scheduler = ExportScheduler(max_workers)
+metrics = RunMetrics()
+dimensions = {}
+for portal, api_key in enumerate(api_keys):
+    limiter = RateBudget()
+    controller = AdaptiveController(max_workers)
+    # Owners are fetched once per portal and shared by its objects
+    owners = get_owners(api_key, limiter, metrics) if enrich_labels else None
+    for object_name in object_names:
+        if enrich_labels:
+            dimensions[(portal, object_name)] = Dimensions(object_name, owners)
+        pages = get_values(api_key, properties_type, list_input, object_name, limiter, controller, metrics)
+        scheduler.add((portal, object_name), pages, int(priorities.get(object_name) or 0), controller)
+
+output.write_schema([
+    {"name": "portal", "type": "int"},
+    {"name": "object_type", "type": "string"},
+    {"name": "object", "type": "string"}
+])
+counters = {}
+writer = output.get_writer()
+logger.info("Writer opened")
+for (portal, object_name), item in scheduler.run():
+    with metrics.timer('write'):
+        write_data_tagged(writer, item, portal, object_name, dimensions.get((portal, object_name)))
+    metrics.add_records(len(item))
+    counters[(portal, object_name)] = counters.get((portal, object_name), 0) + len(item)
+writer.close()
+logger.info("Writer closed")
+
+for (portal, object_name), counter in sorted(counters.items()):
+    logger.info(str(counter) + " " + object_name + " downloaded from portal " + str(portal))
+metrics.emit(output)
@@ -1,16 +1,11 @@
-from dataiku import pandasutils as pdu
-import pandas as pd, numpy as np
-import re
 import dataiku
-import dataikuapi
-from dataiku import api_client as client
-from dataiku.core.sql import SQLExecutor2
-import json, time, requests
 import logging
 from dataiku.customrecipe import get_output_names_for_role, get_recipe_config
-import urllib
-from pandas.io.json import json_normalize
-from hubspot import write_data_json, write_data_columns, get_values
+from hubspot import write_data_json, write_data_columns, get_values, get_owners
+from hubspot.dimensions import Dimensions
+from hubspot.snapshot import SnapshotStore
+from hubspot.adaptive import AdaptiveController
+from hubspot.metrics import RunMetrics
 
 logger = logging.getLogger(__name__)
 
@@ -23,20 +18,38 @@ object_name = get_recipe_config()['object_name']
 format_output = get_recipe_config()['format']
 properties_type = get_recipe_config()['properties_to_retrieve']
 list_input = get_recipe_config()['custom_properties_list']
-counter = 0
+snapshot_path = get_recipe_config().get('snapshot_path')
+snapshot = SnapshotStore(snapshot_path) if snapshot_path else None
+# Page size adapts to response sizes, latency, 429s and timeouts; a single export has no concurrency to adapt
+controller = AdaptiveController(max_concurrency=1)
+metrics = RunMetrics()
+# Owner lookups are fetched once and joined onto every page
+dimensions = Dimensions(object_name, get_owners(api_key, metrics=metrics)) if get_recipe_config().get('enrich_labels') else None
 
 if format_output == 'JSON':
     writer = output.get_writer()
     logger.info( "Writer opened")
-    for item in get_values(api_key, properties_type, list_input, object_name):
-        write_data_json(writer, item, output, format_output)
-        counter += 1
+    for item in get_values(api_key, properties_type, list_input, object_name, controller=controller, metrics=metrics):
+        with metrics.timer('write'):
+            write_data_json(writer, item, output, format_output, dimensions)
+        if snapshot:
+            with metrics.timer('snapshot'):
+                snapshot.upsert(object_name, item)
+        metrics.add_records(len(item))
     writer.close()
     logger.info( "Writer closed")
     
 elif format_output == 'Readable with columns':    
-    for item in get_values(api_key, properties_type, list_input, object_name):
-        write_data_columns(item, output, format_output)
-        counter += 1
+    for item in get_values(api_key, properties_type, list_input, object_name, controller=controller, metrics=metrics):
+        with metrics.timer('write'):
+            write_data_columns(item, output, format_output, dimensions)
+        if snapshot:
+            with metrics.timer('snapshot'):
+                snapshot.upsert(object_name, item)
+        metrics.add_records(len(item))
 
-logger.info(str(counter) + " " + object_name + " downloaded")
\ No newline at end of file
+if snapshot:
+    logger.info(str(snapshot.finish(object_name)) + " " + object_name + " in snapshot " + snapshot_path)
+
+logger.info(str(metrics.records) + " " + object_name + " downloaded")
+metrics.emit(output)
\ No newline at end of file
@@ -1,22 +1,20 @@
 from dataiku.llm.agent_tools import BaseAgentTool
-import requests
-import json
 import logging
+from hubspot.schemas import get_schema_registry
+from hubspot.deadline import Deadline, DEADLINE_INPUT_SCHEMA
+from hubspot.output import tool_response, output_budget
+from hubspot.metrics import traced, atraced
 
 class HubspotGetSchemasTool(BaseAgentTool):
     """Retrieves all custom object schemas defined in the HubSpot account."""
-    
-    HUBSPOT_API_HOST = "https://api.hubspot.com"
-    
+
     def set_config(self, config, plugin_config):
         self.access_token = config["hubspot_api_connection"]
-        
-        # Re-use one Session for every request
-        self.session = requests.Session()
-        self.session.headers.update({
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        })
+        self.max_output_chars = output_budget(config)
+
+        # Schemas are shared with the other tools and refreshed in the background
+        self.schemas = get_schema_registry(self.access_token)
+        self.request_stats = self.schemas.stats
         
     def get_descriptor(self, tool):
         return {
@@ -37,47 +35,61 @@ class HubspotGetSchemasTool(BaseAgentTool):
                 "$id": "https://dataiku.com/agents/tools/get-schemas/input",
                 "title": "Input for HubSpot Get Schemas tool",
                 "type": "object",
-                "properties": {}  # No input properties needed
+                "properties": {
+                    "resultOffset": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "description": "Index of the first result to return. Use the continuation.resultOffset of a truncated response."
+                    },
+                    "deadlineSeconds": DEADLINE_INPUT_SCHEMA
+                }
             }
         }
         
+    def _respond(self, schemas, input):
+        # Simplify the results to match the JavaScript implementation
+        simplified_results = []
+        for schema in schemas:
+            # Extract objectType from fullyQualifiedName
+            object_type = schema.get("fullyQualifiedName", "").split('_')[1] if '_' in schema.get("fullyQualifiedName", "") else ""
+            
+            simplified_results.append({
+                "objectTypeId": schema.get("objectTypeId"),
+                "objectType": object_type,
+                "name": schema.get("name"),
+                "labels": schema.get("labels")
+            })
+        
+        formatted_result = {"results": simplified_results}
+        
+        return tool_response(
+            formatted_result,
+            "Retrieved HubSpot custom object schemas",
+            "HubSpot Schema Information",
+            self.max_output_chars,
+            input.get("input", {}).get("resultOffset", 0)
+        )
+
+    def _error(self, e):
+        logging.error(f"Error retrieving HubSpot schemas: {str(e)}")
+        return {
+            "output": {"error": f"Error retrieving HubSpot schemas: {str(e)}"},
+            "isError": True
+        }
+
+    @traced("get-schemas")
     def invoke(self, input, trace):
         try:
-            url = f"{self.HUBSPOT_API_HOST}/crm-object-schemas/v3/schemas"
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            schemas = response.json()
-            
-            # Simplify the results to match the JavaScript implementation
-            simplified_results = []
-            for schema in schemas.get("results", []):
-                # Extract objectType from fullyQualifiedName
-                object_type = schema.get("fullyQualifiedName", "").split('_')[1] if '_' in schema.get("fullyQualifiedName", "") else ""
-                
-                simplified_results.append({
-                    "objectTypeId": schema.get("objectTypeId"),
-                    "objectType": object_type,
-                    "name": schema.get("name"),
-                    "labels": schema.get("labels")
-                })
-            
-            formatted_result = {"results": simplified_results}
-            
-            return {
-                "output": formatted_result,
-                "sources": [{
-                    "toolCallDescription": "Retrieved HubSpot custom object schemas",
-                    "items": [{
-                        "type": "SIMPLE_DOCUMENT",
-                        "title": "HubSpot Schema Information",
-                        "content": json.dumps(formatted_result, indent=2)
-                    }]
-                }]
-            }
-            
+            deadline = Deadline.from_args(input.get("input", {}))
+            return self._respond(self.schemas.get(timeout=deadline.timeout()), input)
+        except Exception as e:
+            return self._error(e)
+
+    @atraced("get-schemas")
+    async def ainvoke(self, input, trace):
+        """Asyncio variant of invoke, sharing the event loop's connection pool with the other tools."""
+        try:
+            deadline = Deadline.from_args(input.get("input", {}))
+            return self._respond(await self.schemas.aget(timeout=deadline.timeout()), input)
         except Exception as e:
-            logging.error(f"Error retrieving HubSpot schemas: {str(e)}")
-            return {
-                "output": {"error": f"Error retrieving HubSpot schemas: {str(e)}"},
-                "isError": True
-            }
\ No newline at end of file
+            return self._error(e)
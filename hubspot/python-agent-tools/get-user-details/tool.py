@@ -1,12 +1,41 @@
 from dataiku.llm.agent_tools import BaseAgentTool
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import requests
-import json
+import threading
 import logging
+from hubspot.aio import AsyncHubspotClient
+from hubspot.cache import get_shared_cache, make_key
+from hubspot.constants import Constants
+from hubspot.deadline import Deadline, DeadlineExceeded, DEADLINE_INPUT_SCHEMA
+from hubspot.output import compact
+from hubspot.metrics import get_request_stats, traced, atraced
 
 class HubspotGetUserDetailsTool(BaseAgentTool):
+    REQUEST_TIMEOUT = 10
+
     def set_config(self, config, plugin_config):
         self.access_token = config["hubspot_api_connection"]
-        self.base_url = "https://api.hubspot.com"
+        self.base_url = Constants.API_HOST
+
+        # Re-use one Session for every request (keeps TLS connection alive)
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.access_token}",
+            "Content-Type": "application/json"
+        })
+
+        # Every response feeds the tool's request totals, reported on trace spans
+        self.request_stats = get_request_stats("get-user-details")
+        self.session.hooks["response"].append(self.request_stats.hook)
+
+        # Async variant shares pooled connections with the other tools
+        self.async_client = AsyncHubspotClient(self.access_token, self.request_stats)
+
+        # Token details never change for a given token, so they are cached across calls and tools
+        self.cache = get_shared_cache()
+        self._details = None
+        self._details_lock = threading.Lock()
         
     def get_descriptor(self, tool):
         return {
@@ -30,74 +59,204 @@ class HubspotGetUserDetailsTool(BaseAgentTool):
                 "$id": "https://dataiku.com/agents/tools/get-user-details/input",
                 "title": "Input for HubSpot Get User Details tool",
                 "type": "object",
-                "properties": {}  # No input properties needed
+                "properties": {
+                    "deadlineSeconds": DEADLINE_INPUT_SCHEMA
+                }
             }
         }
 
-    def invoke(self, input, trace):
+    def _get_token_info(self, deadline):
+        token_info_url = f"{self.base_url}/oauth/v2/private-apps/get/access-token-info"
+        token_info_response = self.session.post(
+            token_info_url,
+            json={"tokenKey": self.access_token},
+            timeout=deadline.timeout(self.REQUEST_TIMEOUT)
+        )
+        token_info_response.raise_for_status()
+        return token_info_response.json()
+
+    def _get_optional(self, url, deadline, notes):
+        # Account and owner details are best-effort: a missing scope or a failed request must not fail the call
         try:
-            # Get token info
-            token_info_url = f"{self.base_url}/oauth/v2/private-apps/get/access-token-info"
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            token_info_response = requests.post(
-                token_info_url, 
-                headers=headers, 
-                json={"tokenKey": self.access_token}
+            response = self.session.get(url, timeout=deadline.timeout(self.REQUEST_TIMEOUT))
+        except Exception as e:
+            if deadline.expired():
+                raise DeadlineExceeded(f"Deadline of {deadline.seconds:g}s exceeded")
+            if not isinstance(e, requests.RequestException):
+                raise
+            notes.append(self._note(url, e))
+            return None
+        if response.status_code == 200:
+            return response.json()
+        return None
+
+    def _note(self, url, e):
+        logging.warning(f"Optional HubSpot user detail request failed: {str(e)}")
+        return f"Could not get {url.split('?')[0].replace(self.base_url, '')}: {type(e).__name__}"
+
+    def _fetch_details(self, deadline):
+        # Token info and account info are independent, so they are requested concurrently;
+        # the owner lookup starts as soon as the token info provides a userId
+        partial = False
+        notes = []
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            account_info_future = executor.submit(
+                self._get_optional, f"{self.base_url}/account-info/v3/details", deadline, notes
             )
-            token_info_response.raise_for_status()
-            token_info = token_info_response.json()
-            
-            # Get account info
-            account_info_url = f"{self.base_url}/account-info/v3/details"
-            account_info_response = requests.get(account_info_url, headers=headers)
-            
-            if account_info_response.status_code == 200:
-                account_info = account_info_response.json()
-            else:
-                account_info = None
-            
+            token_info = self._get_token_info(deadline)
+
             # Get owner info if token info has userId
             owner_info = None
             if token_info and "userId" in token_info:
                 owner_info_url = f"{self.base_url}/crm/v3/owners/{token_info['userId']}?idProperty=userId&archived=false"
-                owner_info_response = requests.get(owner_info_url, headers=headers)
-                
-                if owner_info_response.status_code == 200:
-                    owner_info = owner_info_response.json()
-            
-            # Format the response
-            formatted_response = {
-                "tokenInfo": token_info,
-                "ownerInfo": owner_info,
-                "accountInfo": account_info
-            }
-            
-            # Generate human-readable content for sources
-            readable_content = (
-                f"- Token Info: {json.dumps(token_info, indent=2)}\n"
-                f"- Owner Info: {json.dumps(owner_info, indent=2)}\n"
-                f"- Account Info: {json.dumps(account_info, indent=2)}"
+                try:
+                    owner_info = self._get_optional(owner_info_url, deadline, notes)
+                except DeadlineExceeded:
+                    partial = True
+
+            try:
+                account_info = account_info_future.result()
+            except DeadlineExceeded:
+                account_info = None
+                partial = True
+
+        return self._format(token_info, owner_info, account_info, partial, notes)
+
+    def _format(self, token_info, owner_info, account_info, partial, notes):
+        formatted_response = {
+            "tokenInfo": token_info,
+            "ownerInfo": owner_info,
+            "accountInfo": account_info
+        }
+        if partial:
+            # Owner or account details did not arrive before the deadline
+            formatted_response["partial"] = True
+        if notes:
+            # Owner or account lookups that failed, leaving their details empty
+            formatted_response["notes"] = notes
+        return formatted_response
+
+    def _keep(self, key, details):
+        # The answer never changes for a token, so a complete one is kept for the lifetime of the tool
+        if details.get("partial") or details.get("notes"):
+            self.cache.invalidate(key)
+        else:
+            self._details = details
+        return details
+
+    def _get_details(self, deadline):
+        with self._details_lock:
+            if self._details is not None:
+                return self._details
+            key = make_key("get-user-details", self.access_token, {})
+            details = self.cache.get_or_compute(
+                key,
+                lambda: self._fetch_details(deadline),
+                ttl=Constants.CACHE_METADATA_TTL_SECONDS,
+                wait_timeout=deadline.remaining()
             )
-            
-            return {
-                "output": formatted_response,
-                "sources": [{
-                    "toolCallDescription": "Retrieved HubSpot user details",
-                    "items": [{
-                        "type": "SIMPLE_DOCUMENT",
-                        "title": "HubSpot User Details",
-                        "content": readable_content
-                    }]
+            return self._keep(key, details)
+
+    async def _aget_optional(self, path, deadline, notes):
+        import aiohttp
+
+        try:
+            return await self.async_client.get(
+                path, timeout=deadline.timeout(self.REQUEST_TIMEOUT), raise_for_status=False
+            )
+        except Exception as e:
+            if deadline.expired():
+                raise DeadlineExceeded(f"Deadline of {deadline.seconds:g}s exceeded")
+            if not isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError)):
+                raise
+            notes.append(self._note(path, e))
+            return None
+
+    async def _afetch_details(self, deadline):
+        notes = []
+
+        async def token_and_owner_info():
+            token_info = await self.async_client.post(
+                "/oauth/v2/private-apps/get/access-token-info",
+                json={"tokenKey": self.access_token},
+                timeout=deadline.timeout(self.REQUEST_TIMEOUT)
+            )
+            if not (token_info and "userId" in token_info):
+                return token_info, None, False
+            try:
+                owner_info = await self._aget_optional(
+                    f"/crm/v3/owners/{token_info['userId']}?idProperty=userId&archived=false", deadline, notes
+                )
+                return token_info, owner_info, False
+            except DeadlineExceeded:
+                return token_info, None, True
+
+        async def account_info():
+            try:
+                return await self._aget_optional("/account-info/v3/details", deadline, notes), False
+            except DeadlineExceeded:
+                return None, True
+
+        (token_info, owner_info, owner_partial), (account_info, account_partial) = await asyncio.gather(
+            token_and_owner_info(), account_info()
+        )
+        return self._format(token_info, owner_info, account_info, owner_partial or account_partial, notes)
+
+    def _respond(self, formatted_response):
+        token_info = formatted_response["tokenInfo"]
+        owner_info = formatted_response["ownerInfo"]
+        account_info = formatted_response["accountInfo"]
+        
+        # Generate human-readable content for sources
+        readable_content = (
+            f"- Token Info: {compact(token_info)}\n"
+            f"- Owner Info: {compact(owner_info)}\n"
+            f"- Account Info: {compact(account_info)}"
+        )
+        if formatted_response.get("notes"):
+            readable_content += "\n- Notes: " + "; ".join(formatted_response["notes"])
+        
+        return {
+            "output": formatted_response,
+            "sources": [{
+                "toolCallDescription": "Retrieved HubSpot user details",
+                "items": [{
+                    "type": "SIMPLE_DOCUMENT",
+                    "title": "HubSpot User Details",
+                    "content": readable_content
                 }]
-            }
-            
+            }]
+        }
+
+    def _error(self, e):
+        logging.error(f"Error retrieving HubSpot user details: {str(e)}")
+        return {
+            "output": {"error": f"Error retrieving HubSpot user details: {str(e)}"},
+            "isError": True
+        }
+
+    @traced("get-user-details")
+    def invoke(self, input, trace):
+        try:
+            deadline = Deadline.from_args(input.get("input", {}))
+            return self._respond(self._get_details(deadline))
         except Exception as e:
-            logging.error(f"Error retrieving HubSpot user details: {str(e)}")
-            return {
-                "output": {"error": f"Error retrieving HubSpot user details: {str(e)}"},
-                "isError": True
-            }
+            return self._error(e)
+
+    @atraced("get-user-details")
+    async def ainvoke(self, input, trace):
+        """Asyncio variant of invoke, sharing the event loop's connection pool with the other tools."""
+        try:
+            deadline = Deadline.from_args(input.get("input", {}))
+            if self._details is not None:
+                return self._respond(self._details)
+            key = make_key("get-user-details", self.access_token, {})
+            details = await self.cache.aget_or_compute(
+                key,
+                lambda: self._afetch_details(deadline),
+                ttl=Constants.CACHE_METADATA_TTL_SECONDS,
+                wait_timeout=deadline.remaining()
+            )
+            return self._respond(self._keep(key, details))
+        except Exception as e:
+            return self._error(e)
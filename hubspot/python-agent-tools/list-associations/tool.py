@@ -1,15 +1,21 @@
 from dataiku.llm.agent_tools import BaseAgentTool
 import requests
-import json
 import logging
+from hubspot.aio import AsyncHubspotClient
+from hubspot.cache import get_shared_cache, make_key
+from hubspot.constants import Constants
+from hubspot.deadline import Deadline, DEADLINE_INPUT_SCHEMA
+from hubspot.output import tool_response, output_budget
+from hubspot.metrics import get_request_stats, traced, atraced
 
 class HubspotListAssociationsTool(BaseAgentTool):
     """Lists associations between a specific HubSpot object and other objects of a particular type."""
 
-    HUBSPOT_API_HOST = "https://api.hubspot.com"
+    HUBSPOT_API_HOST = Constants.API_HOST
 
     def set_config(self, config, plugin_config):
         self.access_token = config["hubspot_api_connection"]
+        self.max_output_chars = output_budget(config)
         
         # Re-use one Session for every request (keeps TLS connection alive)
         self.session = requests.Session()
@@ -17,7 +23,17 @@ class HubspotListAssociationsTool(BaseAgentTool):
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json"
         })
+
+        # Every response feeds the tool's request totals, reported on trace spans
+        self.request_stats = get_request_stats("list-associations")
+        self.session.hooks["response"].append(self.request_stats.hook)
         
+        # Async variant shares pooled connections with the other tools
+        self.async_client = AsyncHubspotClient(self.access_token, self.request_stats)
+
+        # Identical association lookups within the cache TTL are answered without calling HubSpot
+        self.cache = get_shared_cache()
+
         # List of common HubSpot object types for reference
         self.hubspot_object_types = [
             "contacts", "companies", "deals", "tickets",
@@ -41,6 +57,7 @@ class HubspotListAssociationsTool(BaseAgentTool):
                 1  Call list-associations to get the IDs of related records.  
                 2  Call list-objects with ids=[…] to pull full details of those related records.  
             • Use when you already have the source objectId and want to map its connections.
+            • If the response has truncated=true, repeat the call with the same arguments and resultOffset=continuation.resultOffset.
             
             """,
             "inputSchema": {
@@ -63,15 +80,19 @@ class HubspotListAssociationsTool(BaseAgentTool):
                     "after": {
                         "type": "string",
                         "description": "Paging cursor token for retrieving the next page of results"
-                    }
+                    },
+                    "resultOffset": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "description": "Index of the first result to return. Use the continuation.resultOffset of a truncated response."
+                    },
+                    "deadlineSeconds": DEADLINE_INPUT_SCHEMA
                 },
                 "required": ["objectType", "objectId", "toObjectType"]
             }
         }
 
-    def invoke(self, input, trace):
-        args = input.get("input", {})
-        
+    def _validate(self, args):
         # Validate required parameters
         required_params = ["objectType", "objectId", "toObjectType"]
         for param in required_params:
@@ -80,36 +101,76 @@ class HubspotListAssociationsTool(BaseAgentTool):
                     "output": {"error": f"Missing required parameter '{param}'"},
                     "isError": True
                 }
+        return None
+
+    def _endpoint(self, args):
+        # Build the API path
+        endpoint = f"/crm/v4/objects/{args['objectType']}/{args['objectId']}/associations/{args['toObjectType']}?limit=500"
+        
+        # Add pagination parameter if provided
+        if args.get("after"):
+            endpoint += f"&after={args['after']}"
+        return endpoint
+
+    def _respond(self, data, args):
+        return tool_response(
+            data,
+            f"Listed associations from {args['objectType']} to {args['toObjectType']}",
+            f"HubSpot associations: {args['objectType']} -> {args['toObjectType']}",
+            self.max_output_chars,
+            args.get("resultOffset", 0)
+        )
+
+    def _error(self, e):
+        logging.error(f"Error retrieving HubSpot associations: {str(e)}")
+        return {
+            "output": {"error": f"Error retrieving HubSpot associations: {str(e)}"},
+            "isError": True
+        }
+
+    @traced("list-associations")
+    def invoke(self, input, trace):
+        args = input.get("input", {})
+        error = self._validate(args)
+        if error:
+            return error
         
         try:
-            # Build the API path
-            endpoint = f"/crm/v4/objects/{args['objectType']}/{args['objectId']}/associations/{args['toObjectType']}?limit=500"
-            
-            # Add pagination parameter if provided
-            if args.get("after"):
-                endpoint += f"&after={args['after']}"
+            endpoint = self._endpoint(args)
+            deadline = Deadline.from_args(args)
             
             # Make API request
-            url = f"{self.HUBSPOT_API_HOST}{endpoint}"
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            
-            return {
-                "output": data,
-                "sources": [{
-                    "toolCallDescription": f"Listed associations from {args['objectType']} to {args['toObjectType']}",
-                    "items": [{
-                        "type": "SIMPLE_DOCUMENT",
-                        "title": f"HubSpot associations: {args['objectType']} -> {args['toObjectType']}",
-                        "content": json.dumps(data, indent=2)
-                    }]
-                }]
-            }
+            def fetch():
+                url = f"{self.HUBSPOT_API_HOST}{endpoint}"
+                response = self.session.get(url, timeout=deadline.timeout())
+                response.raise_for_status()
+                return response.json()
+
+            key = make_key("list-associations", self.access_token, {"endpoint": endpoint})
+            data = self.cache.get_or_compute(key, fetch, wait_timeout=deadline.remaining())
+            return self._respond(data, args)
             
         except Exception as e:
-            logging.error(f"Error retrieving HubSpot associations: {str(e)}")
-            return {
-                "output": {"error": f"Error retrieving HubSpot associations: {str(e)}"},
-                "isError": True
-            }
\ No newline at end of file
+            return self._error(e)
+
+    @atraced("list-associations")
+    async def ainvoke(self, input, trace):
+        """Asyncio variant of invoke, sharing the event loop's connection pool with the other tools."""
+        args = input.get("input", {})
+        error = self._validate(args)
+        if error:
+            return error
+
+        try:
+            endpoint = self._endpoint(args)
+            deadline = Deadline.from_args(args)
+
+            async def fetch():
+                return await self.async_client.get(endpoint, timeout=deadline.timeout())
+
+            key = make_key("list-associations", self.access_token, {"endpoint": endpoint})
+            data = await self.cache.aget_or_compute(key, fetch, wait_timeout=deadline.remaining())
+            return self._respond(data, args)
+
+        except Exception as e:
+            return self._error(e)
@@ -1,14 +1,28 @@
 from dataiku.llm.agent_tools import BaseAgentTool
-import requests, json, logging
+import requests, logging
+from hubspot.aio import AsyncHubspotClient
+from hubspot.cache import get_shared_cache, make_key
+from hubspot.schemas import get_schema_registry
+from hubspot.snapshot import get_snapshot_store, query_snapshot, arun_snapshot, check_live_cursor
+from hubspot.constants import Constants
+from hubspot.dimensions import with_labels, awith_labels
+from hubspot.deadline import Deadline, DeadlineExceeded, DEADLINE_INPUT_SCHEMA
+from hubspot.output import tool_response, output_budget
+from hubspot.metrics import get_request_stats, traced, atraced
 
 
 class HubspotListObjectsTool(BaseAgentTool):
     """List objects of any standard or custom schema in a HubSpot portal."""
 
-    HUBSPOT_API_HOST = "https://api.hubspot.com"
+    HUBSPOT_API_HOST = Constants.API_HOST
+
+    # batch/read accepts at most 100 ids; larger id lists are read in chunks
+    BATCH_READ_SIZE = 100
+    MAX_IDS = 1000
 
     def set_config(self, config, plugin_config):
         self.access_token = config["hubspot_api_connection"]
+        self.max_output_chars = output_budget(config)
 
         # Re-use one Session for every request (keeps TLS connection alive)
         self.session = requests.Session()
@@ -17,19 +31,30 @@ class HubspotListObjectsTool(BaseAgentTool):
             "Content-Type": "application/json"
         })
 
-        # Pre-fetch object schemas so we can display valid choices
-        self._object_types = None
-        try:
-            r = self.session.get(f"{self.HUBSPOT_API_HOST}/crm/v3/schemas", timeout=10)
-            r.raise_for_status()
-            self._object_types = sorted(s["name"] for s in r.json().get("results", []))
-        except Exception as e:
-            logging.debug(f"Could not fetch schemas list from HubSpot: {e}")
+        # Every response feeds the tool's request totals, reported on trace spans
+        self.request_stats = get_request_stats("list-objects")
+        self.session.hooks["response"].append(self.request_stats.hook)
 
+        # Async variant shares pooled connections with the other tools
+        self.async_client = AsyncHubspotClient(self.access_token, self.request_stats)
+
+        # Identical list calls within the cache TTL are answered without calling HubSpot
+        self.cache = get_shared_cache()
+
+        # Optional local snapshot written by the export recipe, used while it is fresh enough
+        snapshot_path = config.get("snapshot_path")
+        self.snapshot = get_snapshot_store(snapshot_path) if snapshot_path else None
+        self.snapshot_max_age = config.get("snapshot_max_age_minutes") or Constants.SNAPSHOT_MAX_AGE_MINUTES
+
+        # Object schemas load in the background so valid choices can be displayed
+        # once known, without delaying tool startup
+        self.schemas = get_schema_registry(self.access_token)
+        self.schemas.peek()
 
     def _allowed_object_types(self):
-        if self._object_types:             # live list from tenant
-            return self._object_types
+        object_types = self.schemas.object_type_names()
+        if object_types:                   # live list from tenant
+            return object_types
         # fallback list of well-known CRM objects
         return [
             "contacts", "companies", "deals", "tickets",
@@ -56,6 +81,9 @@ class HubspotListObjectsTool(BaseAgentTool):
             • To fetch specific records returned by list-associations, supply  
               ids=["123","456"] – this avoids the need for a separate batch-read tool.  
             • For targeted queries on property values, use search-objects instead.
+            • If the response has truncated=true, repeat the call with the same arguments and resultOffset=continuation.resultOffset.
+            • Set resolveLabels=true to get owner, pipeline and stage names instead of looking up their ids
+              (the id properties, e.g. hubspot_owner_id or dealstage, must be among the returned properties).
             
             """,
             "inputSchema": {
@@ -102,23 +130,35 @@ class HubspotListObjectsTool(BaseAgentTool):
                         "items": {"type": "string"},
                         "description": (
                             "Optional. If supplied, the call returns ONLY these records "
-                            "(max 100 IDs) using HubSpot's batch/read endpoint."
+                            "(max 1000 IDs, read 100 at a time) using HubSpot's batch/read endpoint. "
+                            "If the deadline cuts the read short, pass resume.ids to continue."
                         )
-                    }
+                    },
+                    "resultOffset": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "description": "Index of the first result to return. Use the continuation.resultOffset of a truncated response."
+                    },
+                    "resolveLabels": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "Add a labels object to each record with the names behind hubspot_owner_id and pipeline/stage ids."
+                    },
+                    "deadlineSeconds": DEADLINE_INPUT_SCHEMA
                 },
                 "required": ["objectType"]
             }
         }
 
-    def invoke(self, input, trace):
-        args = input.get("input", {})
+    def _prepare(self, args):
+        """Returns (error response, object type, query parameters, ids)."""
         object_type = args.get("objectType")
 
         if not object_type:
             return {
                 "output": {"error": "Missing required parameter 'objectType'."},
                 "isError": True
-            }
+            }, None, None, None
 
         # Standard list parameters
         params = {}
@@ -133,57 +173,179 @@ class HubspotListObjectsTool(BaseAgentTool):
         if "archived" in args:
             params["archived"] = str(args["archived"]).lower()
 
-        # Hubspot call
-        try:
-            ids = args.get("ids")
-
-            if ids:
-                if len(ids) > 100:
-                    return {
-                        "output": {"error": "ids array exceeds HubSpot limit of 100."},
-                        "isError": True
-                    }
+        ids = args.get("ids")
+        if ids and len(ids) > self.MAX_IDS:
+            return {
+                "output": {"error": f"ids array exceeds the limit of {self.MAX_IDS}."},
+                "isError": True
+            }, object_type, None, None
+
+        return None, object_type, params, ids
+
+    def _format(self, data):
+        # Flatten results
+        results = [
+            {
+                "id": item.get("id"),
+                "properties": item.get("properties", {}),
+                "createdAt": item.get("createdAt"),
+                "updatedAt": item.get("updatedAt"),
+                "archived": item.get("archived"),
+                "archivedAt": item.get("archivedAt"),
+                "associations": item.get("associations", {})
+            }
+            for item in data.get("results", [])
+        ]
+
+        return {"results": results, "paging": data.get("paging", {})}
+
+    def _respond(self, formatted, object_type, args):
+        return tool_response(
+            formatted,
+            f"Listed HubSpot objects of type: {object_type}",
+            f"HubSpot {object_type} objects",
+            self.max_output_chars,
+            args.get("resultOffset", 0)
+        )
+
+    def _error(self, object_type, e):
+        logging.error(f"Error listing HubSpot {object_type}: {e}")
+        return {
+            "output": {"error": f"Error listing HubSpot {object_type}: {e}"},
+            "isError": True
+        }
+
+    def _from_snapshot(self, object_type, args, ids):
+        """Answers from the local snapshot, or returns None when the live API must be used."""
+        if ids:
+            return query_snapshot(
+                self.snapshot, self.snapshot_max_age, object_type,
+                lambda: self.snapshot.read(object_type, ids, args.get("properties"))
+            )
+        if args.get("associations") or args.get("archived"):
+            return None
+        request = {"limit": args.get("limit", 10), "after": args.get("after"), "properties": args.get("properties")}
+        return query_snapshot(
+            self.snapshot, self.snapshot_max_age, object_type,
+            lambda: self.snapshot.search(object_type, request)
+        )
+
+    def _with_labels(self, formatted, object_type, args, deadline):
+        # Owner and pipeline lookups are fetched once and shared with the other tools through the cache
+        return with_labels(
+            formatted, args, self.session, self.access_token, object_type, self.HUBSPOT_API_HOST, deadline
+        )
+
+    async def _awith_labels(self, formatted, object_type, args, deadline):
+        return await awith_labels(formatted, args, self.async_client, self.access_token, object_type, deadline)
+
+    def _read_ids(self, object_type, ids, deadline):
+        # batch/read accepts 100 ids per call; chunks are read in order until the deadline
+        results = []
+        for start in range(0, len(ids), self.BATCH_READ_SIZE):
+            chunk = ids[start:start + self.BATCH_READ_SIZE]
+
+            def fetch():
                 url = f"{self.HUBSPOT_API_HOST}/crm/v3/objects/{object_type}/batch/read"
-                payload = {"inputs": [{"id": str(_id)} for _id in ids]}
-                r = self.session.post(url, json=payload, timeout=30)
-            else:
-                url = f"{self.HUBSPOT_API_HOST}/crm/v3/objects/{object_type}"
-                r = self.session.get(url, params=params, timeout=30)
+                payload = {"inputs": [{"id": str(_id)} for _id in chunk]}
+                r = self.session.post(url, json=payload, timeout=deadline.timeout())
+                r.raise_for_status()
+                return self._format(r.json())
+
+            try:
+                key = make_key("list-objects", self.access_token, {"objectType": object_type, "ids": chunk})
+                formatted = self.cache.get_or_compute(key, fetch, wait_timeout=deadline.remaining())
+            except Exception as e:
+                if isinstance(e, DeadlineExceeded) or deadline.expired():
+                    return self._partial(results, ids[start:])
+                raise
+            results.extend(formatted["results"])
+        return {"results": results, "paging": {}}
+
+    async def _aread_ids(self, object_type, ids, deadline):
+        results = []
+        for start in range(0, len(ids), self.BATCH_READ_SIZE):
+            chunk = ids[start:start + self.BATCH_READ_SIZE]
+
+            async def fetch():
+                payload = {"inputs": [{"id": str(_id)} for _id in chunk]}
+                data = await self.async_client.post(
+                    f"/crm/v3/objects/{object_type}/batch/read", json=payload, timeout=deadline.timeout()
+                )
+                return self._format(data)
+
+            try:
+                key = make_key("list-objects", self.access_token, {"objectType": object_type, "ids": chunk})
+                formatted = await self.cache.aget_or_compute(key, fetch, wait_timeout=deadline.remaining())
+            except Exception as e:
+                if isinstance(e, DeadlineExceeded) or deadline.expired():
+                    return self._partial(results, ids[start:])
+                raise
+            results.extend(formatted["results"])
+        return {"results": results, "paging": {}}
+
+    def _partial(self, results, remaining_ids):
+        return {
+            "results": results,
+            "paging": {},
+            "partial": True,
+            "resume": {"ids": [str(_id) for _id in remaining_ids]}
+        }
+
+    @traced("list-objects")
+    def invoke(self, input, trace):
+        args = input.get("input", {})
+        error, object_type, params, ids = self._prepare(args)
+        if error:
+            return error
 
+        def fetch():
+            url = f"{self.HUBSPOT_API_HOST}/crm/v3/objects/{object_type}"
+            r = self.session.get(url, params=params, timeout=deadline.timeout())
             r.raise_for_status()
-            data = r.json()
-
-            # Flatten results
-            results = [
-                {
-                    "id": item.get("id"),
-                    "properties": item.get("properties", {}),
-                    "createdAt": item.get("createdAt"),
-                    "updatedAt": item.get("updatedAt"),
-                    "archived": item.get("archived"),
-                    "archivedAt": item.get("archivedAt"),
-                    "associations": item.get("associations", {})
-                }
-                for item in data.get("results", [])
-            ]
-
-            formatted = {"results": results, "paging": data.get("paging", {})}
+            return self._format(r.json())
 
-            return {
-                "output": formatted,
-                "sources": [{
-                    "toolCallDescription": f"Listed HubSpot objects of type: {object_type}",
-                    "items": [{
-                        "type": "SIMPLE_DOCUMENT",
-                        "title": f"HubSpot {object_type} objects",
-                        "content": json.dumps(formatted, indent=2)
-                    }]
-                }]
-            }
+        # Hubspot call
+        try:
+            deadline = Deadline.from_args(args)
+            formatted = self._from_snapshot(object_type, args, ids)
+            if formatted is None and ids:
+                formatted = self._read_ids(object_type, ids, deadline)
+            elif formatted is None:
+                check_live_cursor(args.get("after"))
+                key = make_key("list-objects", self.access_token, dict(params, objectType=object_type))
+                formatted = self.cache.get_or_compute(key, fetch, wait_timeout=deadline.remaining())
+            formatted = self._with_labels(formatted, object_type, args, deadline)
+            return self._respond(formatted, object_type, args)
 
         except Exception as e:
-            logging.error(f"Error listing HubSpot {object_type}: {e}")
-            return {
-                "output": {"error": f"Error listing HubSpot {object_type}: {e}"},
-                "isError": True
-            }
\ No newline at end of file
+            return self._error(object_type, e)
+
+    @atraced("list-objects")
+    async def ainvoke(self, input, trace):
+        """Asyncio variant of invoke, sharing the event loop's connection pool with the other tools."""
+        args = input.get("input", {})
+        error, object_type, params, ids = self._prepare(args)
+        if error:
+            return error
+
+        async def fetch():
+            data = await self.async_client.get(
+                f"/crm/v3/objects/{object_type}", params=params, timeout=deadline.timeout()
+            )
+            return self._format(data)
+
+        try:
+            deadline = Deadline.from_args(args)
+            formatted = await arun_snapshot(self.snapshot, self._from_snapshot, object_type, args, ids)
+            if formatted is None and ids:
+                formatted = await self._aread_ids(object_type, ids, deadline)
+            elif formatted is None:
+                check_live_cursor(args.get("after"))
+                key = make_key("list-objects", self.access_token, dict(params, objectType=object_type))
+                formatted = await self.cache.aget_or_compute(key, fetch, wait_timeout=deadline.remaining())
+            formatted = await self._awith_labels(formatted, object_type, args, deadline)
+            return self._respond(formatted, object_type, args)
+
+        except Exception as e:
+            return self._error(object_type, e)
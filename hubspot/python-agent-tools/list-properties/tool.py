@@ -1,10 +1,16 @@
 from dataiku.llm.agent_tools import BaseAgentTool
-import requests, json, logging
+import requests, logging
+from hubspot.aio import AsyncHubspotClient
+from hubspot.cache import get_shared_cache, make_key
+from hubspot.constants import Constants
+from hubspot.deadline import Deadline, DEADLINE_INPUT_SCHEMA
+from hubspot.output import tool_response, output_budget
+from hubspot.metrics import get_request_stats, traced, atraced
 
 class HubspotListPropertiesTool(BaseAgentTool):
     """List properties for any standard or custom schema in a HubSpot portal."""
 
-    HUBSPOT_API_HOST = "https://api.hubspot.com"
+    HUBSPOT_API_HOST = Constants.API_HOST
     
     # Standard HubSpot object types for reference in the description
     HUBSPOT_OBJECT_TYPES = [
@@ -15,6 +21,7 @@ class HubspotListPropertiesTool(BaseAgentTool):
 
     def set_config(self, config, plugin_config):
         self.access_token = config["hubspot_api_connection"]
+        self.max_output_chars = output_budget(config)
         
         # Re-use one Session for every request (keeps TLS connection alive)
         self.session = requests.Session()
@@ -23,6 +30,16 @@ class HubspotListPropertiesTool(BaseAgentTool):
             "Content-Type": "application/json"
         })
 
+        # Every response feeds the tool's request totals, reported on trace spans
+        self.request_stats = get_request_stats("list-properties")
+        self.session.hooks["response"].append(self.request_stats.hook)
+
+        # Async variant shares pooled connections with the other tools
+        self.async_client = AsyncHubspotClient(self.access_token, self.request_stats)
+
+        # Property catalogues rarely change, so they are cached across calls and tools
+        self.cache = get_shared_cache()
+
     def get_descriptor(self, tool):
         object_types = ", ".join(self.HUBSPOT_OBJECT_TYPES)
         return {
@@ -38,6 +55,7 @@ class HubspotListPropertiesTool(BaseAgentTool):
             • Response can be large; request only when you genuinely need the full catalogue.  
             • For a quick sense of common fields, sample a handful of records with list-objects first.  
             • Set includeHidden=true if you need internal or deprecated fields.
+            • If the response has truncated=true, repeat the call with the same arguments and resultOffset=continuation.resultOffset.
             
             """,
             "inputSchema": {
@@ -58,12 +76,60 @@ class HubspotListPropertiesTool(BaseAgentTool):
                         "type": "boolean",
                         "default": False,
                         "description": "Whether to include hidden properties in the response."
-                    }
+                    },
+                    "resultOffset": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "description": "Index of the first result to return. Use the continuation.resultOffset of a truncated response."
+                    },
+                    "deadlineSeconds": DEADLINE_INPUT_SCHEMA
                 },
                 "required": ["objectType"]
             }
         }
 
+    def _format(self, data):
+        # Filter each result to include only specific fields
+        filtered_results = [
+            {
+                "name": prop.get("name"),
+                "label": prop.get("label"),
+                "type": prop.get("type"),
+                "description": prop.get("description"),
+                "groupName": prop.get("groupName")
+            }
+            for prop in data.get("results", [])
+        ]
+        
+        return {
+            "results": filtered_results,
+            "paging": data.get("paging", {})
+        }
+
+    def _respond(self, formatted, object_type, args):
+        return tool_response(
+            formatted,
+            f"Listed HubSpot properties for object type: {object_type}",
+            f"HubSpot {object_type} properties",
+            self.max_output_chars,
+            args.get("resultOffset", 0)
+        )
+
+    def _error(self, object_type, e):
+        logging.error(f"Error listing HubSpot properties for {object_type}: {e}")
+        return {
+            "output": {"error": f"Error listing HubSpot properties for {object_type}: {e}"},
+            "isError": True
+        }
+
+    def _params(self, args):
+        # Build query parameters
+        return {
+            "archived": str(args.get("archived", False)).lower(),
+            "includeHidden": str(args.get("includeHidden", False)).lower()
+        }
+
+    @traced("list-properties")
     def invoke(self, input, trace):
         args = input.get("input", {})
         object_type = args.get("objectType")
@@ -75,51 +141,51 @@ class HubspotListPropertiesTool(BaseAgentTool):
                 "isError": True
             }
         
-        # Build query parameters
-        params = {
-            "archived": str(args.get("archived", False)).lower(),
-            "includeHidden": str(args.get("includeHidden", False)).lower()
-        }
+        params = self._params(args)
         
-        # Call HubSpot
-        try:
+        def fetch():
             url = f"{self.HUBSPOT_API_HOST}/crm/v3/properties/{object_type}"
-            r = self.session.get(url, params=params, timeout=30)
+            r = self.session.get(url, params=params, timeout=deadline.timeout())
             r.raise_for_status()
-            data = r.json()
-            
-            # Filter each result to include only specific fields
-            filtered_results = [
-                {
-                    "name": prop.get("name"),
-                    "label": prop.get("label"),
-                    "type": prop.get("type"),
-                    "description": prop.get("description"),
-                    "groupName": prop.get("groupName")
-                }
-                for prop in data.get("results", [])
-            ]
-            
-            formatted = {
-                "results": filtered_results,
-                "paging": data.get("paging", {})
-            }
-            
-            return {
-                "output": formatted,
-                "sources": [{
-                    "toolCallDescription": f"Listed HubSpot properties for object type: {object_type}",
-                    "items": [{
-                        "type": "SIMPLE_DOCUMENT",
-                        "title": f"HubSpot {object_type} properties",
-                        "content": json.dumps(formatted, indent=2)
-                    }]
-                }]
-            }
-            
+            return self._format(r.json())
+
+        # Call HubSpot
+        try:
+            deadline = Deadline.from_args(args)
+            key = make_key("list-properties", self.access_token, dict(params, objectType=object_type))
+            formatted = self.cache.get_or_compute(
+                key, fetch, ttl=Constants.CACHE_METADATA_TTL_SECONDS, wait_timeout=deadline.remaining()
+            )
+            return self._respond(formatted, object_type, args)
         except Exception as e:
-            logging.error(f"Error listing HubSpot properties for {object_type}: {e}")
+            return self._error(object_type, e)
+
+    @atraced("list-properties")
+    async def ainvoke(self, input, trace):
+        """Asyncio variant of invoke, sharing the event loop's connection pool with the other tools."""
+        args = input.get("input", {})
+        object_type = args.get("objectType")
+
+        if not object_type:
             return {
-                "output": {"error": f"Error listing HubSpot properties for {object_type}: {e}"},
+                "output": {"error": "Missing required parameter 'objectType'."},
                 "isError": True
-            }
\ No newline at end of file
+            }
+
+        params = self._params(args)
+
+        async def fetch():
+            data = await self.async_client.get(
+                f"/crm/v3/properties/{object_type}", params=params, timeout=deadline.timeout()
+            )
+            return self._format(data)
+
+        try:
+            deadline = Deadline.from_args(args)
+            key = make_key("list-properties", self.access_token, dict(params, objectType=object_type))
+            formatted = await self.cache.aget_or_compute(
+                key, fetch, ttl=Constants.CACHE_METADATA_TTL_SECONDS, wait_timeout=deadline.remaining()
+            )
+            return self._respond(formatted, object_type, args)
+        except Exception as e:
+            return self._error(object_type, e)
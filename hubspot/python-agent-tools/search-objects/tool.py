@@ -1,7 +1,17 @@
 from dataiku.llm.agent_tools import BaseAgentTool
+from concurrent.futures import ThreadPoolExecutor, wait
+import asyncio
 import requests
-import json
 import logging
+from hubspot.aio import AsyncHubspotClient
+from hubspot.cache import get_shared_cache, make_key
+from hubspot.constants import Constants
+from hubspot.dimensions import with_labels, awith_labels
+from hubspot.deadline import Deadline, DeadlineExceeded, DEADLINE_INPUT_SCHEMA
+from hubspot.output import compact, fit, tool_response, output_budget
+from hubspot.snapshot import get_snapshot_store, query_snapshot, arun_snapshot, check_live_cursor
+from hubspot.metrics import get_request_stats, traced, atraced
+from hubspot.throttle import get_search_throttle
 
 # Constants from the original JS tool
 HUBSPOT_OBJECT_TYPES = [
@@ -10,14 +20,51 @@ HUBSPOT_OBJECT_TYPES = [
     "emails", "meetings", "tasks", "notes"
 ]
 
+class _SearchPages(object):
+    """Results of up to count pages of one search, gathered by following its paging cursors."""
+
+    def __init__(self, args, count):
+        self._args = args
+        self.count = count
+        self.fetched = 0
+        self.results = []
+        self.paging = {}
+        self.after = args.get("after")
+
+    def pending(self):
+        return self.fetched < self.count and (not self.fetched or bool(self.after))
+
+    def args(self):
+        return dict(self._args, after=self.after) if self.after else self._args
+
+    def add(self, page):
+        self.fetched += 1
+        self.results.extend(page["results"])
+        self.paging = page["paging"]
+        self.after = self.paging.get("next", {}).get("after")
+
+    def partial(self):
+        # A null resume.after means the first page itself did not arrive in time
+        return {"results": self.results, "paging": self.paging, "partial": True, "resume": {"after": self.after}}
+
+    def result(self):
+        return {"results": self.results, "paging": self.paging}
+
+
 class HubspotSearchObjectsTool(BaseAgentTool):
     """Performs advanced filtered searches across HubSpot object types using complex criteria."""
 
-    HUBSPOT_API_HOST = "https://api.hubspot.com"
+    HUBSPOT_API_HOST = Constants.API_HOST
+
+    # HubSpot's search endpoints are limited to 5 requests per second per account
+    MAX_CONCURRENT_SEARCHES = 5
+    MAX_BATCH_SEARCHES = 25
+    MAX_SEARCH_PAGES = 10
 
     def set_config(self, config, plugin_config):
         # Get access token from config
         self.access_token = config["hubspot_api_connection"]
+        self.max_output_chars = output_budget(config)
         
         # Re-use one Session for every request (keeps TLS connection alive)
         self.session = requests.Session()
@@ -26,9 +73,27 @@ class HubspotSearchObjectsTool(BaseAgentTool):
             "Content-Type": "application/json"
         })
 
+        # Every response feeds the tool's request totals, reported on trace spans
+        self.request_stats = get_request_stats("search-objects")
+        self.session.hooks["response"].append(self.request_stats.hook)
+
+        # Async variant shares pooled connections with the other tools
+        self.async_client = AsyncHubspotClient(self.access_token, self.request_stats)
+
+        # Identical searches within the cache TTL are answered without calling HubSpot
+        self.cache = get_shared_cache()
+
+        # Optional local snapshot written by the export recipe, used while it is fresh enough
+        snapshot_path = config.get("snapshot_path")
+        self.snapshot = get_snapshot_store(snapshot_path) if snapshot_path else None
+        self.snapshot_max_age = config.get("snapshot_max_age_minutes") or Constants.SNAPSHOT_MAX_AGE_MINUTES
+
+        # Spaces out search calls so concurrent batches, of any session on the account, stay within the rate limit
+        self.throttle = get_search_throttle(self.access_token)
+
     def get_descriptor(self, tool):
         object_types = ", ".join(HUBSPOT_OBJECT_TYPES)
-        return {
+        descriptor = {
             "description": """
             
             Purpose:
@@ -41,6 +106,14 @@ class HubspotSearchObjectsTool(BaseAgentTool):
             • Preferred when you know EXACTLY what you’re looking for (e.g. “deals with amount > 10 000 closed this month”).  
             • Use list-objects first to discover property names, then search-objects for the precise pull.  
             • If search returns IDs you need to inspect in full, pass those IDs to list-objects (ids=…).
+            • To run several independent searches at once (e.g. one per pipeline or per email), pass them
+              in the searches array; they run concurrently and results are keyed by each search's id.
+            • Set resolveLabels=true to get owner, pipeline and stage names instead of looking up their ids
+              (the id properties, e.g. hubspot_owner_id or dealstage, must be among the returned properties).
+            • If the response (or one search in a batch) has truncated=true, repeat it with the same arguments
+              and resultOffset=continuation.resultOffset.
+            • If the response has partial=true, the deadline cut the call short: continue with resume.after
+              (or resume.searches for a batch).
             
             """,
             "inputSchema": {
@@ -151,82 +224,337 @@ class HubspotSearchObjectsTool(BaseAgentTool):
                             "required": ["filters"]
                         },
                         "description": "Groups of filters to apply (combined with OR)."
-                    }
+                    },
+                    "resultOffset": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "description": "Index of the first result to return. Use the continuation.resultOffset of a truncated response."
+                    },
+                    "resolveLabels": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "Add a labels object to each record with the names behind hubspot_owner_id and pipeline/stage ids."
+                    },
+                    "pages": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "maximum": 10,
+                        "default": 1,
+                        "description": "Number of consecutive result pages to fetch in this call, following the paging cursor."
+                    },
+                    "deadlineSeconds": DEADLINE_INPUT_SCHEMA
                 },
                 "required": ["objectType"]
             }
         }
 
-    def invoke(self, input, trace):
-        args = input.get("input", {})
-        object_type = args.get("objectType")
+        # Each batched search accepts the same criteria as a single search
+        search_properties = dict(descriptor["inputSchema"]["properties"])
+        del search_properties["deadlineSeconds"]
+        search_properties["objectType"] = dict(
+            search_properties["objectType"],
+            description="The type of HubSpot object to search. Defaults to the top-level objectType."
+        )
+        search_properties["id"] = {
+            "type": "string",
+            "description": "Key under which this search's results are returned. Defaults to its position in the array."
+        }
+        descriptor["inputSchema"]["properties"]["searches"] = {
+            "type": "array",
+            "maxItems": self.MAX_BATCH_SEARCHES,
+            "items": {
+                "type": "object",
+                "properties": search_properties
+            },
+            "description": (
+                "Optional. Several independent searches to run concurrently in one call "
+                f"(max {self.MAX_BATCH_SEARCHES}). When supplied, the top-level search criteria are ignored."
+            )
+        }
+        return descriptor
 
-        # Defensive check
-        if not object_type:
-            return {
-                "output": {"error": "Missing required parameter 'objectType'."},
-                "isError": True
+    def _request_body(self, args):
+        # Prepare request body
+        request_body = {}
+
+        # Add optional parameters
+        if "query" in args:
+            request_body["query"] = args["query"]
+
+        if "limit" in args:
+            request_body["limit"] = args["limit"]
+
+        if "after" in args:
+            request_body["after"] = args["after"]
+
+        if "properties" in args and args["properties"]:
+            request_body["properties"] = args["properties"]
+
+        if "sorts" in args and args["sorts"]:
+            request_body["sorts"] = args["sorts"]
+
+        if "filterGroups" in args and args["filterGroups"]:
+            request_body["filterGroups"] = args["filterGroups"]
+
+        return request_body
+
+    def _format(self, data):
+        # Format the results
+        results = [
+            {
+                "id": item.get("id"),
+                "properties": item.get("properties", {}),
+                "createdAt": item.get("createdAt"),
+                "updatedAt": item.get("updatedAt"),
+                "archived": item.get("archived", False),
+                "archivedAt": item.get("archivedAt")
             }
+            for item in data.get("results", [])
+        ]
 
-        try:
-            # Prepare request body
-            request_body = {}
-            
-            # Add optional parameters
-            if "query" in args:
-                request_body["query"] = args["query"]
-            
-            if "limit" in args:
-                request_body["limit"] = args["limit"]
-            
-            if "after" in args:
-                request_body["after"] = args["after"]
-            
-            if "properties" in args and args["properties"]:
-                request_body["properties"] = args["properties"]
-            
-            if "sorts" in args and args["sorts"]:
-                request_body["sorts"] = args["sorts"]
-            
-            if "filterGroups" in args and args["filterGroups"]:
-                request_body["filterGroups"] = args["filterGroups"]
+        return {"results": results, "paging": data.get("paging", {})}
+
+    def _from_snapshot(self, object_type, request_body):
+        """Answers from the local snapshot, or returns None when the live API must be used."""
+        return query_snapshot(
+            self.snapshot, self.snapshot_max_age, object_type,
+            lambda: self.snapshot.search(object_type, request_body)
+        )
 
+    def _search(self, object_type, args, deadline):
+        request_body = self._request_body(args)
+        local = self._from_snapshot(object_type, request_body)
+        if local is not None:
+            return local
+        check_live_cursor(request_body.get("after"))
+
+        def fetch():
             # Call HubSpot API
+            self.throttle.wait(deadline)
             url = f"{self.HUBSPOT_API_HOST}/crm/v3/objects/{object_type}/search"
-            response = self.session.post(url, json=request_body, timeout=30)
+            response = self.session.post(url, json=request_body, timeout=deadline.timeout())
             response.raise_for_status()
-            data = response.json()
-
-            # Format the results
-            results = [
-                {
-                    "id": item.get("id"),
-                    "properties": item.get("properties", {}),
-                    "createdAt": item.get("createdAt"),
-                    "updatedAt": item.get("updatedAt"),
-                    "archived": item.get("archived", False),
-                    "archivedAt": item.get("archivedAt")
-                }
-                for item in data.get("results", [])
-            ]
+            return self._format(response.json())
 
-            formatted = {"results": results, "paging": data.get("paging", {})}
+        key = make_key("search-objects", self.access_token, dict(request_body, objectType=object_type))
+        return self.cache.get_or_compute(key, fetch, wait_timeout=deadline.remaining())
 
-            return {
-                "output": formatted,
-                "sources": [{
-                    "toolCallDescription": f"Searched HubSpot {object_type} with criteria",
-                    "items": [{
-                        "type": "SIMPLE_DOCUMENT",
-                        "title": f"HubSpot {object_type} search results",
-                        "content": json.dumps(formatted, indent=2)
-                    }]
-                }]
-            }
+    async def _asearch(self, object_type, args, deadline):
+        request_body = self._request_body(args)
+        local = await arun_snapshot(self.snapshot, self._from_snapshot, object_type, request_body)
+        if local is not None:
+            return local
+        check_live_cursor(request_body.get("after"))
 
-        except Exception as e:
-            logging.error(f"Error searching HubSpot {object_type}: {str(e)}")
+        async def fetch():
+            await self.throttle.await_slot(deadline)
+            data = await self.async_client.post(
+                f"/crm/v3/objects/{object_type}/search", json=request_body, timeout=deadline.timeout()
+            )
+            return self._format(data)
+
+        key = make_key("search-objects", self.access_token, dict(request_body, objectType=object_type))
+        return await self.cache.aget_or_compute(key, fetch, wait_timeout=deadline.remaining())
+
+    def _with_labels(self, formatted, object_type, args, deadline):
+        # Owner and pipeline lookups are fetched once and shared with the other tools through the cache
+        return with_labels(
+            formatted, args, self.session, self.access_token, object_type, self.HUBSPOT_API_HOST, deadline
+        )
+
+    async def _awith_labels(self, formatted, object_type, args, deadline):
+        return await awith_labels(formatted, args, self.async_client, self.access_token, object_type, deadline)
+
+    def _page_count(self, args):
+        return max(1, min(args.get("pages", 1), self.MAX_SEARCH_PAGES))
+
+    def _search_pages(self, object_type, args, deadline):
+        # Follows paging cursors for up to `pages` pages, stopping early at the deadline
+        pages = _SearchPages(args, self._page_count(args))
+        while pages.pending():
+            try:
+                pages.add(self._search(object_type, pages.args(), deadline))
+            except Exception as e:
+                if isinstance(e, DeadlineExceeded) or deadline.expired():
+                    return pages.partial()
+                raise
+        return pages.result()
+
+    async def _asearch_pages(self, object_type, args, deadline):
+        pages = _SearchPages(args, self._page_count(args))
+        while pages.pending():
+            try:
+                pages.add(await self._asearch(object_type, pages.args(), deadline))
+            except Exception as e:
+                if isinstance(e, DeadlineExceeded) or deadline.expired():
+                    return pages.partial()
+                raise
+        return pages.result()
+
+    def _batch_error(self, object_type, e):
+        logging.error(f"Error searching HubSpot {object_type}: {str(e)}")
+        return {"error": f"Error searching HubSpot {object_type}: {str(e)}"}
+
+    def _batch_outcome(self, keys, searches, outcomes):
+        # Searches still running at the deadline are handed back for a later call
+        formatted = {"results": {key: outcome for key, outcome in zip(keys, outcomes) if outcome is not None}}
+        pending = [dict(search, id=key) for key, search, outcome in zip(keys, searches, outcomes) if outcome is None]
+        if pending:
+            formatted["partial"] = True
+            formatted["resume"] = {"searches": pending}
+        return formatted
+
+    def _search_batch(self, default_object_type, searches, deadline):
+        # The output budget is shared evenly between the searches
+        max_chars = self.max_output_chars // len(searches)
+
+        def run(search):
+            object_type = search.get("objectType", default_object_type)
+            try:
+                formatted = self._search_pages(object_type, search, deadline)
+                formatted = self._with_labels(formatted, object_type, search, deadline)
+                return fit(formatted, max_chars, search.get("resultOffset", 0))
+            except Exception as e:
+                if isinstance(e, DeadlineExceeded) or deadline.expired():
+                    return None
+                return self._batch_error(object_type, e)
+
+        keys = [str(search.get("id", i)) for i, search in enumerate(searches)]
+        workers = min(self.MAX_CONCURRENT_SEARCHES, len(searches))
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = [executor.submit(run, search) for search in searches]
+        wait(futures, timeout=deadline.remaining())
+        outcomes = []
+        for future in futures:
+            if future.done():
+                outcomes.append(future.result())
+            else:
+                future.cancel()
+                outcomes.append(None)
+        # Searches still in flight are bounded by the deadline timeouts; don't wait for them
+        executor.shutdown(wait=False)
+        return self._batch_outcome(keys, searches, outcomes)
+
+    async def _asearch_batch(self, default_object_type, searches, deadline):
+        max_chars = self.max_output_chars // len(searches)
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_SEARCHES)
+
+        async def run(search):
+            object_type = search.get("objectType", default_object_type)
+            try:
+                async with semaphore:
+                    formatted = await self._asearch_pages(object_type, search, deadline)
+                    formatted = await self._awith_labels(formatted, object_type, search, deadline)
+                return fit(formatted, max_chars, search.get("resultOffset", 0))
+            except Exception as e:
+                if isinstance(e, DeadlineExceeded) or deadline.expired():
+                    return None
+                return self._batch_error(object_type, e)
+
+        keys = [str(search.get("id", i)) for i, search in enumerate(searches)]
+        tasks = [asyncio.ensure_future(run(search)) for search in searches]
+        await asyncio.wait(tasks, timeout=deadline.remaining())
+        outcomes = []
+        for task in tasks:
+            if task.done():
+                outcomes.append(task.result())
+            else:
+                task.cancel()
+                outcomes.append(None)
+        return self._batch_outcome(keys, searches, outcomes)
+
+    def _validate(self, args):
+        # Defensive check
+        if not args.get("objectType"):
             return {
-                "output": {"error": f"Error searching HubSpot {object_type}: {str(e)}"},
+                "output": {"error": "Missing required parameter 'objectType'."},
                 "isError": True
             }
+
+        searches = args.get("searches")
+        if searches:
+            if not isinstance(searches, list) or not all(isinstance(search, dict) for search in searches):
+                return {
+                    "output": {"error": "searches must be an array of search objects."},
+                    "isError": True
+                }
+            if len(searches) > self.MAX_BATCH_SEARCHES:
+                return {
+                    "output": {"error": f"searches array exceeds the limit of {self.MAX_BATCH_SEARCHES}."},
+                    "isError": True
+                }
+            keys = [str(search.get("id", i)) for i, search in enumerate(searches)]
+            if len(set(keys)) != len(keys):
+                return {
+                    "output": {"error": "Each search in the searches array must have a unique id."},
+                    "isError": True
+                }
+        return None
+
+    def _respond_batch(self, formatted):
+        outcomes = formatted["results"]
+        failed = [key for key, outcome in outcomes.items() if "error" in outcome]
+
+        return {
+            "output": formatted,
+            "isError": len(failed) == len(outcomes) and "resume" not in formatted,
+            "sources": [{
+                "toolCallDescription": f"Ran {len(outcomes)} HubSpot searches ({len(failed)} failed)",
+                "items": [{
+                    "type": "SIMPLE_DOCUMENT",
+                    "title": f"HubSpot batch search results ({key})",
+                    "content": compact(outcome)
+                } for key, outcome in outcomes.items()]
+            }]
+        }
+
+    def _respond(self, formatted, object_type, args):
+        return tool_response(
+            formatted,
+            f"Searched HubSpot {object_type} with criteria",
+            f"HubSpot {object_type} search results",
+            self.max_output_chars,
+            args.get("resultOffset", 0)
+        )
+
+    def _error(self, object_type, e):
+        logging.error(f"Error searching HubSpot {object_type}: {str(e)}")
+        return {
+            "output": {"error": f"Error searching HubSpot {object_type}: {str(e)}"},
+            "isError": True
+        }
+
+    @traced("search-objects")
+    def invoke(self, input, trace):
+        args = input.get("input", {})
+        object_type = args.get("objectType")
+        error = self._validate(args)
+        if error:
+            return error
+        try:
+            deadline = Deadline.from_args(args)
+            if args.get("searches"):
+                return self._respond_batch(self._search_batch(object_type, args["searches"], deadline))
+
+            formatted = self._search_pages(object_type, args, deadline)
+            return self._respond(self._with_labels(formatted, object_type, args, deadline), object_type, args)
+        except Exception as e:
+            return self._error(object_type, e)
+
+    @atraced("search-objects")
+    async def ainvoke(self, input, trace):
+        """Asyncio variant of invoke, sharing the event loop's connection pool with the other tools."""
+        args = input.get("input", {})
+        object_type = args.get("objectType")
+        error = self._validate(args)
+        if error:
+            return error
+        try:
+            deadline = Deadline.from_args(args)
+            if args.get("searches"):
+                return self._respond_batch(await self._asearch_batch(object_type, args["searches"], deadline))
+
+            formatted = await self._asearch_pages(object_type, args, deadline)
+            return self._respond(await self._awith_labels(formatted, object_type, args, deadline), object_type, args)
+        except Exception as e:
+            return self._error(object_type, e)
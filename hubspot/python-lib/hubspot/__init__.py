@@ -1,2 +1,2 @@
-from hubspot.writer import write_data_json, write_data_columns
-from hubspot.api_calls import get_values
\ No newline at end of file
+from hubspot.writer import write_data_json, write_data_columns, write_data_tagged
+from hubspot.api_calls import get_values, get_owners
\ No newline at end of file
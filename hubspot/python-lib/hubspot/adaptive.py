@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from hubspot.constants import Constants
+
+logger = logging.getLogger(__name__)
+
+# Largest page each export endpoint accepts
+MAX_PAGE_SIZES = {
+    "contacts": Constants.CONTACTS_LIMIT,
+    "companies": Constants.COMPANIES_LIMIT
+}
+
+
+class AdaptiveController(object):
+    """AIMD controller for the concurrency and page size of the exports of one portal.
+
+    Offset paging keeps each export to one request at a time, so concurrency is the number of
+    the portal's exports ExportScheduler advances at once: it starts at one, grows by one per
+    round of healthy pages and halves on 429s and timeouts. Page sizes start small and grow
+    additively towards the size whose responses weigh about target_bytes; they halve on 429s,
+    timeouts and responses slower than target_latency. The constants only act as upper bounds.
+    """
+
+    def __init__(self, max_concurrency=Constants.EXPORT_MAX_WORKERS,
+                 target_bytes=Constants.ADAPTIVE_TARGET_PAGE_BYTES,
+                 target_latency=Constants.ADAPTIVE_TARGET_LATENCY_SECONDS):
+        self.max_concurrency = max_concurrency
+        self.target_bytes = target_bytes
+        self.target_latency = target_latency
+        self.concurrency = 1
+        self._in_flight = 0
+        self._healthy = 0
+        self._last_decrease = 0.0
+        self._page_sizes = {}
+        self._bytes_per_record = {}
+        self._lock = threading.Lock()
+
+    # Concurrency (gate of ExportScheduler)
+
+    def try_acquire(self):
+        """Takes one of the portal's export slots, returning False when all are in use."""
+        with self._lock:
+            if self._in_flight >= self.concurrency:
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _healthy_page(self):
+        # One round is one healthy page per slot, so the limit grows by about one per round trip
+        self._healthy += 1
+        if self._healthy >= self.concurrency and self.concurrency < self.max_concurrency:
+            self.concurrency += 1
+            self._healthy = 0
+            logger.info(f"Export concurrency increased to {self.concurrency}")
+
+    # Page size
+
+    def _initial_page_size(self, object_name):
+        maximum = MAX_PAGE_SIZES.get(object_name, Constants.CONTACTS_LIMIT)
+        return min(maximum, Constants.ADAPTIVE_INITIAL_PAGE_SIZE)
+
+    def page_size(self, object_name):
+        with self._lock:
+            return self._page_sizes.get(object_name) or self._initial_page_size(object_name)
+
+    def _shrink_page(self, object_name, reason):
+        current = self._page_sizes.get(object_name) or self._initial_page_size(object_name)
+        self._page_sizes[object_name] = max(Constants.ADAPTIVE_MIN_PAGE_SIZE, current // 2)
+        logger.info(f"Export page size for {object_name} decreased to {self._page_sizes[object_name]} ({reason})")
+
+    def observe_page(self, object_name, response_bytes, records, latency):
+        """Records a successful page, moving the page size towards responses of about target_bytes."""
+        maximum = MAX_PAGE_SIZES.get(object_name, Constants.CONTACTS_LIMIT)
+        with self._lock:
+            if latency > self.target_latency:
+                self._shrink_page(object_name, f"{latency:.1f}s response")
+                return
+            self._healthy_page()
+            if not records:
+                return
+            previous = self._bytes_per_record.get(object_name)
+            per_record = response_bytes / float(records)
+            if previous is not None:
+                per_record = 0.8 * previous + 0.2 * per_record
+            self._bytes_per_record[object_name] = per_record
+
+            target = int(min(maximum, max(Constants.ADAPTIVE_MIN_PAGE_SIZE, self.target_bytes / per_record)))
+            current = self._page_sizes.get(object_name) or self._initial_page_size(object_name)
+            if target > current:
+                target = min(target, current + max(1, maximum // 10))
+            self._page_sizes[object_name] = target
+
+    def backoff(self, object_name, latency, reason):
+        """Halves the page size and the concurrency after a 429 or a timeout."""
+        with self._lock:
+            self._shrink_page(object_name, reason)
+            self._healthy = 0
+            # Requests already in flight when congestion started only count once
+            now = time.monotonic()
+            if now - self._last_decrease > latency and self.concurrency > 1:
+                self.concurrency = max(1, self.concurrency // 2)
+                logger.info(f"Export concurrency decreased to {self.concurrency} ({reason})")
+            self._last_decrease = now
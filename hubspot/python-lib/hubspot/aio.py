@@ -0,0 +1,92 @@
+import asyncio
+import json as jsonlib
+import threading
+import logging
+import time
+from hubspot.constants import Constants
+from hubspot.metrics import RATE_LIMIT_HEADER
+
+HUBSPOT_API_HOST = Constants.API_HOST
+
+logger = logging.getLogger(__name__)
+
+# One aiohttp session (and connection pool) per event loop, shared by every tool and token.
+# A session references its loop, so entries are dropped explicitly rather than through weak keys.
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _drop_closed_loops():
+    # Must be called with the lock held
+    for loop in [loop for loop in _sessions if loop.is_closed()]:
+        _sessions.pop(loop)
+        logger.warning("Dropped the HubSpot session of a loop closed without close_async_sessions()")
+
+
+def _get_session():
+    # aiohttp is only loaded once a tool is used through ainvoke
+    import aiohttp
+
+    loop = asyncio.get_event_loop()
+    with _sessions_lock:
+        _drop_closed_loops()
+        session = _sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit=Constants.ASYNC_MAX_CONNECTIONS)
+            session = _sessions[loop] = aiohttp.ClientSession(connector=connector)
+        return session
+
+
+class AsyncHubspotClient(object):
+    """Asyncio HubSpot client authenticating with a private app token.
+
+    Must be used from a coroutine; requests go through the connection pool of the running loop.
+    """
+
+    def __init__(self, access_token, stats=None):
+        # Optional RequestStats recording every response
+        self.stats = stats
+        self.headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json"
+        }
+
+    async def request(self, method, path, params=None, json=None, timeout=30, raise_for_status=True):
+        """Returns the decoded JSON body, or None for an error status when raise_for_status is False."""
+        import aiohttp
+
+        started = time.monotonic()
+        async with _get_session().request(
+            method,
+            f"{HUBSPOT_API_HOST}{path}",
+            params=params,
+            json=json,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as r:
+            body = await r.read()
+            if self.stats is not None:
+                self.stats.record(time.monotonic() - started, len(body), r.status, r.headers.get(RATE_LIMIT_HEADER))
+            if r.status >= 400 and not raise_for_status:
+                return None
+            r.raise_for_status()
+            return jsonlib.loads(body) if body.strip() else None
+
+    async def get(self, path, params=None, timeout=30, raise_for_status=True):
+        return await self.request("GET", path, params=params, timeout=timeout, raise_for_status=raise_for_status)
+
+    async def post(self, path, json=None, timeout=30, raise_for_status=True):
+        return await self.request("POST", path, json=json, timeout=timeout, raise_for_status=raise_for_status)
+
+
+async def close_async_sessions():
+    """Closes the shared session of the running loop; await it before closing the loop.
+
+    Sessions of loops closed without it are dropped the next time a session is created,
+    leaving their sockets to be released by the garbage collector.
+    """
+    loop = asyncio.get_event_loop()
+    with _sessions_lock:
+        session = _sessions.pop(loop, None)
+    if session is not None:
+        await session.close()
@@ -1,17 +1,21 @@
-import dataiku
-import pandas as pd, numpy as np
-from dataiku import pandasutils as pdu
 import json, time, requests
 from hubspot.constants import Constants
+from hubspot.dimensions import fetch_owners
+from hubspot.metrics import RATE_LIMIT_HEADER
 import logging
 
-def get_properties(apikey, object_name):
-    url = "https://api.hubapi.com/properties/v1/" + object_name + "/properties?"
+def get_properties(apikey, object_name, limiter=None, metrics=None):
+    url = Constants.LEGACY_API_HOST + "/properties/v1/" + object_name + "/properties?"
+    if limiter:
+        limiter.acquire()
+    started = time.time()
     try:
         r = requests.get(url, params = {'hapikey': apikey})
     except Exception as e:
         logging.exception("API exception when calling %s ".format(url), e)
         raise Exception("API exception when calling %s ".format(url))
+    if metrics:
+        metrics.record(time.time() - started, len(r.content), r.status_code, r.headers.get(RATE_LIMIT_HEADER))
 
     if r.status_code != 200:
         logging.error("API error when calling {}, error code {}. Returned response : {}".format(r.url, r.status_code, r.json()))
@@ -20,37 +24,101 @@ def get_properties(apikey, object_name):
     list_properties = [x[u'name'] for x in response_dict]
     return list_properties
 
-def get_values(apikey, properties_type, list_input, object_name):
+def get_owners(apikey, limiter=None, metrics=None):
+    # Owners are shared by every object of a portal; the recipes only export contacts and companies,
+    # which have no pipelines, so pipeline lookups are left to the agent tools.
+    # limiter and metrics are the portal's RateBudget and the run's RunMetrics, as for get_values
+    url = Constants.LEGACY_API_HOST
+
+    def get_json(path, params):
+        if limiter:
+            limiter.acquire()
+        started = time.time()
+        try:
+            r = requests.get(url + path, params=dict(params or {}, hapikey=apikey),
+                             timeout=Constants.REQUEST_TIMEOUT_SECONDS)
+        except Exception as e:
+            logging.exception("API exception when calling {}".format(url + path))
+            raise Exception("API exception when calling {}".format(url + path))
+        if metrics:
+            metrics.record(time.time() - started, len(r.content), r.status_code, r.headers.get(RATE_LIMIT_HEADER))
+
+        if r.status_code != 200:
+            logging.error("API error when calling {}, error code {}. Returned response : {}".format(r.url, r.status_code, r.text))
+            raise Exception('API error when calling {}, error code {}. Returned response : {}'.format(r.url, r.status_code, r.text))
+        return r.json()
+
+    return fetch_owners(get_json)
+
+def get_values(apikey, properties_type, list_input, object_name, limiter=None, controller=None, metrics=None):
+    # limiter is an optional RateBudget shared by every export of the same portal,
+    # controller an optional AdaptiveController tuning its page size,
+    # metrics an optional RunMetrics recording each request
     if object_name == 'contacts':
         limit = Constants.CONTACTS_LIMIT
-        url_feat = "https://api.hubapi.com/contacts/v1/lists/all/contacts/all?"
+        url_feat = Constants.LEGACY_API_HOST + "/contacts/v1/lists/all/contacts/all?"
         if properties_type == 'Standard':
             parameter_dict = {'hapikey': apikey, 'count': limit}
         elif properties_type == 'All':
-            properties = get_properties(apikey, object_name)
+            properties = get_properties(apikey, object_name, limiter, metrics)
             parameter_dict = {'hapikey': apikey, 'count': limit, 'property': properties}
         elif properties_type == 'Custom':
             properties = list_input
             parameter_dict = {'hapikey': apikey, 'count': limit, 'property': properties} 
     elif object_name == 'companies':
         limit = Constants.COMPANIES_LIMIT
-        url_feat = "https://api.hubapi.com/companies/v2/companies/paged?"
+        url_feat = Constants.LEGACY_API_HOST + "/companies/v2/companies/paged?"
         if properties_type == 'Standard':
             parameter_dict = {'hapikey': apikey, 'count': limit}
         elif properties_type == 'All':
-            properties = get_properties(apikey, object_name)
+            properties = get_properties(apikey, object_name, limiter, metrics)
             parameter_dict = {'hapikey': apikey, 'count': limit, 'properties': properties}
         elif properties_type == 'Custom':
             properties = list_input
             parameter_dict = {'hapikey': apikey, 'count': limit, 'properties': properties} 
     has_more = True
     counter = 0
+    retries = 0
     while has_more:
+        if controller:
+            parameter_dict['count'] = controller.page_size(object_name)
+        if limiter:
+            limiter.acquire()
+        started = time.time()
         try:
-            r = requests.get(url_feat, params=parameter_dict)
+            r = requests.get(url_feat, params=parameter_dict,
+                             timeout=Constants.REQUEST_TIMEOUT_SECONDS if controller else None)
         except Exception as e:
-            logging.exception("API exception when calling %s ".format(url_feat), e)
-            raise Exception("API exception when calling %s ".format(url_feat))
+            if controller and isinstance(e, requests.Timeout) and retries < Constants.EXPORT_MAX_RETRIES:
+                # Retried with a smaller page
+                logging.warning("Timeout when calling {}, retrying".format(url_feat))
+                controller.backoff(object_name, time.time() - started, "timeout")
+                retries += 1
+                if metrics:
+                    metrics.record_retry()
+                continue
+            logging.exception("API exception when calling {}".format(url_feat))
+            raise Exception("API exception when calling {}".format(url_feat))
+        elapsed = time.time() - started
+        if metrics:
+            metrics.record(elapsed, len(r.content), r.status_code, r.headers.get(RATE_LIMIT_HEADER))
+            metrics.add_timing('fetch', elapsed)
+
+        if r.status_code == 429 and (limiter or controller) and retries < Constants.EXPORT_MAX_RETRIES:
+            # Every export of the portal backs off together, then the same page is retried;
+            # once the retries are spent the 429 is raised below like any other API error
+            retry_after = float(r.headers.get('Retry-After') or Constants.RATE_LIMIT_BACKOFF_SECONDS)
+            logging.warning("Rate limited when calling {}, retrying in {}s".format(url_feat, retry_after))
+            if controller:
+                controller.backoff(object_name, elapsed, "429")
+            if limiter:
+                limiter.pause(retry_after)
+            else:
+                time.sleep(retry_after)
+            retries += 1
+            if metrics:
+                metrics.record_retry()
+            continue
 
         if r.status_code != 200:
             logging.error(
@@ -60,13 +128,19 @@ def get_values(apikey, properties_type, list_input, object_name):
                 'API error when calling {}, error code {}. Returned response : {}'.format(r.url, r.status_code,
                                                                                           r.json()))
         counter += 1
+        retries = 0
+        parse_started = time.time()
         response_dict = r.json()
+        if metrics:
+            metrics.add_timing('parse', time.time() - parse_started)
         has_more = response_dict['has-more']
+        if controller:
+            controller.observe_page(object_name, len(r.content), len(response_dict[object_name]), elapsed)
         yield response_dict[object_name]
         if object_name == 'contacts':
             parameter_dict['vidOffset']= response_dict['vid-offset']
         elif object_name == 'companies':
             parameter_dict['offset']= response_dict['offset']
-        if counter >= 95:
+        if counter >= 95 and not limiter:
             time.sleep(10)
             counter = 0
\ No newline at end of file
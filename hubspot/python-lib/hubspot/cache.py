@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from hubspot.constants import Constants
+
+logger = logging.getLogger(__name__)
+
+
+class _InFlight(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResponseCache(object):
+    """Thread-safe TTL + LRU cache that coalesces identical in-flight requests.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries=Constants.CACHE_MAX_ENTRIES, ttl=Constants.CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._async_in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute, ttl=None, wait_timeout=None):
+        """Returns the cached value for key, calling compute() at most once across concurrent callers.
+
+        wait_timeout bounds how long a caller waits for an identical request already in flight.
+        """
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                return value
+
+            flight = self._in_flight.get(key)
+            owner = flight is None
+            if owner:
+                flight = _InFlight()
+                self._in_flight[key] = flight
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            if not flight.event.wait(wait_timeout):
+                raise TimeoutError("Timed out waiting for an identical in-flight HubSpot request")
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        succeeded = False
+        try:
+            flight.value = compute()
+            succeeded = True
+            return flight.value
+        except BaseException as e:
+            # Failures are shared with waiting callers but never cached
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if succeeded:
+                    self._store(key, flight.value, self.ttl if ttl is None else ttl)
+                self._in_flight.pop(key, None)
+            flight.event.set()
+
+    async def aget_or_compute(self, key, compute, ttl=None, wait_timeout=None):
+        """Asyncio counterpart of get_or_compute; compute is a coroutine function.
+
+        Identical requests are coalesced within an event loop. The computation runs as its own
+        task, so cancelling the caller that started it does not cancel it for the other callers.
+        """
+        loop = asyncio.get_event_loop()
+        flight_key = (id(loop), key)
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                return value
+
+            task = self._async_in_flight.get(flight_key)
+            owner = task is None
+            if owner:
+                task = asyncio.ensure_future(self._acompute(key, flight_key, compute, ttl))
+                # Marks the exception as retrieved when every caller was cancelled
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                self._async_in_flight[flight_key] = task
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if owner:
+            return await asyncio.shield(task)
+        return await asyncio.wait_for(asyncio.shield(task), wait_timeout)
+
+    async def _acompute(self, key, flight_key, compute, ttl):
+        # Failures are shared with waiting callers but never cached
+        try:
+            value = await compute()
+            with self._lock:
+                self._store(key, value, self.ttl if ttl is None else ttl)
+            return value
+        finally:
+            with self._lock:
+                self._async_in_flight.pop(flight_key, None)
+
+    def _lookup(self, key):
+        # Must be called with the lock held
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._entries[key]
+        return False, None
+
+    def _store(self, key, value, ttl):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "hitRatio": (self.hits + self.coalesced) / lookups if lookups else 0.0
+            }
+
+
+def make_key(namespace, access_token, args):
+    """Builds a cache key from the tool name, a token fingerprint and the normalized arguments."""
+    fingerprint = hashlib.sha256(access_token.encode("utf-8")).hexdigest()[:16]
+    normalized = {k: v for k, v in args.items() if v is not None}
+    return "{}:{}:{}".format(namespace, fingerprint, json.dumps(normalized, sort_keys=True, separators=(",", ":")))
+
+
+_shared_cache = ResponseCache()
+
+
+def get_shared_cache():
+    """Returns the process-wide cache shared by all agent tools."""
+    return _shared_cache
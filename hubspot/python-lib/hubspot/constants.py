@@ -1,3 +1,51 @@
+import os
+
+
 class Constants(object):
+    # HUBSPOT_API_HOST points the plugin at another server, e.g. the benchmark stand-in
+    API_HOST = os.environ.get("HUBSPOT_API_HOST") or "https://api.hubspot.com"
+    LEGACY_API_HOST = os.environ.get("HUBSPOT_API_HOST") or "https://api.hubapi.com"
+
     COMPANIES_LIMIT = 250
-    CONTACTS_LIMIT = 100
\ No newline at end of file
+    CONTACTS_LIMIT = 100
+
+    # Agent tool response cache
+    CACHE_MAX_ENTRIES = 256
+    CACHE_TTL_SECONDS = 60
+    CACHE_METADATA_TTL_SECONDS = 600
+
+    # Search endpoints allow 5 requests per second per account
+    SEARCH_MIN_INTERVAL_SECONDS = 0.2
+
+    # Shared schema registry
+    SCHEMA_REFRESH_SECONDS = 600
+    SCHEMA_RETRY_SECONDS = 60
+
+    # Agent tool output budget, roughly 4 characters per token
+    TOOL_OUTPUT_MAX_CHARS = 40000
+    TOOL_OUTPUT_MIN_VALUE_CHARS = 64
+
+    # Asyncio client connection pool, shared by all tools on an event loop
+    ASYNC_MAX_CONNECTIONS = 10
+
+    # Agent tool call deadlines
+    REQUEST_TIMEOUT_SECONDS = 30
+    TOOL_DEADLINE_SECONDS = 60
+    TOOL_MIN_DEADLINE_SECONDS = 1
+    TOOL_MAX_DEADLINE_SECONDS = 300
+
+    # Local snapshot store
+    SNAPSHOT_MAX_AGE_MINUTES = 60
+
+    # Orchestrated exports: requests per portal within HubSpot's burst window, below its limit of 100 per 10s
+    PORTAL_BURST_REQUESTS = 90
+    PORTAL_BURST_SECONDS = 10
+    RATE_LIMIT_BACKOFF_SECONDS = 10
+    EXPORT_MAX_WORKERS = 4
+    EXPORT_MAX_RETRIES = 3
+
+    # Adaptive export concurrency and page size; EXPORT_MAX_WORKERS and the page limits above are their upper bounds
+    ADAPTIVE_TARGET_PAGE_BYTES = 2000000
+    ADAPTIVE_TARGET_LATENCY_SECONDS = 5
+    ADAPTIVE_INITIAL_PAGE_SIZE = 20
+    ADAPTIVE_MIN_PAGE_SIZE = 10
\ No newline at end of file
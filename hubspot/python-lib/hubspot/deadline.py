@@ -0,0 +1,58 @@
+import time
+from hubspot.constants import Constants
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class Deadline(object):
+    """Overall time budget of a tool call, propagated to each of its HTTP requests."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def from_args(cls, args):
+        """Reads the optional deadlineSeconds tool argument, clamped to the range of DEADLINE_INPUT_SCHEMA.
+
+        Raises ValueError when it is not a positive number.
+        """
+        seconds = args.get("deadlineSeconds")
+        if seconds is None:
+            return cls(Constants.TOOL_DEADLINE_SECONDS)
+        try:
+            if isinstance(seconds, bool):
+                raise TypeError()
+            seconds = float(seconds)
+        except (TypeError, ValueError):
+            raise ValueError(f"deadlineSeconds must be a number of seconds, got {seconds!r}")
+        if not seconds > 0:
+            raise ValueError(f"deadlineSeconds must be greater than 0, got {seconds:g}")
+        return cls(min(max(seconds, Constants.TOOL_MIN_DEADLINE_SECONDS), Constants.TOOL_MAX_DEADLINE_SECONDS))
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, cap=Constants.REQUEST_TIMEOUT_SECONDS):
+        """Returns the timeout for the next request, raising DeadlineExceeded once the budget is spent."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Deadline of {self.seconds:g}s exceeded")
+        return min(cap, remaining)
+
+
+DEADLINE_INPUT_SCHEMA = {
+    "type": "number",
+    "minimum": Constants.TOOL_MIN_DEADLINE_SECONDS,
+    "maximum": Constants.TOOL_MAX_DEADLINE_SECONDS,
+    "default": Constants.TOOL_DEADLINE_SECONDS,
+    "description": (
+        "Overall time budget for this call, in seconds. When it runs out, the results gathered so far "
+        "are returned with partial=true and a resume cursor."
+    )
+}
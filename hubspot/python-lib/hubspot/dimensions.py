@@ -0,0 +1,172 @@
+import logging
+from hubspot.cache import get_shared_cache, make_key
+from hubspot.constants import Constants
+
+logger = logging.getLogger(__name__)
+
+OWNER_PROPERTIES = ("hubspot_owner_id",)
+
+# Pipeline and stage properties of the object types that have pipelines
+PIPELINE_PROPERTIES = {
+    "deals": ("pipeline", "dealstage"),
+    "tickets": ("hs_pipeline", "hs_pipeline_stage")
+}
+
+
+def _owner_label(owner):
+    name = " ".join(part for part in (owner.get("firstName"), owner.get("lastName")) if part)
+    return name or owner.get("email") or str(owner.get("id"))
+
+
+class Dimensions(object):
+    """Id to label lookup tables for the owner, pipeline and stage properties of one object type."""
+
+    def __init__(self, object_type, owners, pipelines=None):
+        self.object_type = object_type
+        self.lookups = {name: {} for name in OWNER_PROPERTIES}
+        for owner in owners:
+            for name in OWNER_PROPERTIES:
+                self.lookups[name][str(owner["id"])] = _owner_label(owner)
+
+        if object_type in PIPELINE_PROPERTIES:
+            pipeline_property, stage_property = PIPELINE_PROPERTIES[object_type]
+            self.lookups[pipeline_property] = {}
+            self.lookups[stage_property] = {}
+            for pipeline in pipelines or []:
+                self.lookups[pipeline_property][str(pipeline["id"])] = pipeline.get("label")
+                for stage in pipeline.get("stages", []):
+                    self.lookups[stage_property][str(stage["id"])] = stage.get("label")
+
+    def label_records(self, results):
+        """Returns copies of CRM v3 records with a labels dict, e.g. {"hubspot_owner_id": "Jane Doe"}."""
+        labelled = []
+        for record in results:
+            properties = record.get("properties") or {}
+            labels = {}
+            for name, lookup in self.lookups.items():
+                value = properties.get(name)
+                if value is not None and str(value) in lookup:
+                    labels[name] = lookup[str(value)]
+            # Records may come from the shared cache, so they are copied rather than modified
+            labelled.append(dict(record, labels=labels) if labels else record)
+        return labelled
+
+    def label_page(self, page):
+        """Adds a label next to the value of v1/v2 records, e.g. properties.hubspot_owner_id.label."""
+        for record in page:
+            properties = record.get("properties") or {}
+            for name, lookup in self.lookups.items():
+                prop = properties.get(name)
+                if isinstance(prop, dict) and str(prop.get("value")) in lookup:
+                    prop["label"] = lookup[str(prop["value"])]
+        return page
+
+    def label_columns(self, frame):
+        """Adds a properties.<name>.label column next to each known properties.<name>.value column."""
+        for name, lookup in self.lookups.items():
+            column = f"properties.{name}.value"
+            if column in frame.columns:
+                frame[f"properties.{name}.label"] = frame[column].astype(str).map(lookup)
+        return frame
+
+
+def _owner_params(data):
+    # Parameters of the next page of owners, or None after the last page
+    after = data.get("paging", {}).get("next", {}).get("after")
+    return {"limit": 500, "after": after} if after else None
+
+
+def fetch_owners(get_json):
+    """Returns every owner of the portal, get_json(path, params) returning the decoded response."""
+    owners, params = [], {"limit": 500}
+    while params:
+        data = get_json("/crm/v3/owners", params)
+        owners.extend(data.get("results", []))
+        params = _owner_params(data)
+    return owners
+
+
+async def afetch_owners(get_json):
+    """Asyncio counterpart of fetch_owners(), get_json being a coroutine function."""
+    owners, params = [], {"limit": 500}
+    while params:
+        data = await get_json("/crm/v3/owners", params)
+        owners.extend(data.get("results", []))
+        params = _owner_params(data)
+    return owners
+
+
+def fetch_dimensions(get_json, object_type):
+    """Builds the lookups for object_type, get_json(path, params) returning the decoded response."""
+    owners = fetch_owners(get_json)
+    pipelines = None
+    if object_type in PIPELINE_PROPERTIES:
+        pipelines = get_json(f"/crm/v3/pipelines/{object_type}", None).get("results", [])
+    return Dimensions(object_type, owners, pipelines)
+
+
+async def afetch_dimensions(get_json, object_type):
+    """Asyncio counterpart of fetch_dimensions(), get_json being a coroutine function."""
+    owners = await afetch_owners(get_json)
+    pipelines = None
+    if object_type in PIPELINE_PROPERTIES:
+        pipelines = (await get_json(f"/crm/v3/pipelines/{object_type}", None)).get("results", [])
+    return Dimensions(object_type, owners, pipelines)
+
+
+def get_dimensions(session, access_token, object_type, host, deadline):
+    """Returns the lookups for object_type, shared across tools for the metadata cache TTL."""
+    def get_json(path, params):
+        response = session.get(f"{host}{path}", params=params, timeout=deadline.timeout())
+        response.raise_for_status()
+        return response.json()
+
+    key = make_key("dimensions", access_token, {"objectType": object_type})
+    return get_shared_cache().get_or_compute(
+        key, lambda: fetch_dimensions(get_json, object_type),
+        ttl=Constants.CACHE_METADATA_TTL_SECONDS, wait_timeout=deadline.remaining()
+    )
+
+
+async def aget_dimensions(async_client, access_token, object_type, deadline):
+    """Asyncio counterpart of get_dimensions(), going through the shared asyncio client."""
+    async def get_json(path, params):
+        return await async_client.get(path, params=params, timeout=deadline.timeout())
+
+    key = make_key("dimensions", access_token, {"objectType": object_type})
+    return await get_shared_cache().aget_or_compute(
+        key, lambda: afetch_dimensions(get_json, object_type),
+        ttl=Constants.CACHE_METADATA_TTL_SECONDS, wait_timeout=deadline.remaining()
+    )
+
+
+def label(formatted, dimensions):
+    """Returns a copy of a tool's formatted response whose records carry their labels."""
+    return dict(formatted, results=dimensions.label_records(formatted["results"]))
+
+
+def with_labels(formatted, args, session, access_token, object_type, host, deadline):
+    """Labels the records of formatted when the tool call asked for resolveLabels.
+
+    Labels are best-effort: when the lookups cannot be fetched the records are returned as they are.
+    """
+    if not args.get("resolveLabels") or not formatted["results"]:
+        return formatted
+    try:
+        dimensions = get_dimensions(session, access_token, object_type, host, deadline)
+    except Exception as e:
+        logger.warning(f"Could not resolve HubSpot labels for {object_type}: {e}")
+        return formatted
+    return label(formatted, dimensions)
+
+
+async def awith_labels(formatted, args, async_client, access_token, object_type, deadline):
+    """Asyncio counterpart of with_labels()."""
+    if not args.get("resolveLabels") or not formatted["results"]:
+        return formatted
+    try:
+        dimensions = await aget_dimensions(async_client, access_token, object_type, deadline)
+    except Exception as e:
+        logger.warning(f"Could not resolve HubSpot labels for {object_type}: {e}")
+        return formatted
+    return label(formatted, dimensions)
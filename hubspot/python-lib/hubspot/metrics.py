@@ -0,0 +1,202 @@
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_HEADER = "X-HubSpot-RateLimit-Remaining"
+
+
+class RequestStats(object):
+    """Thread-safe running totals of the HTTP requests made to HubSpot."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.latency = 0.0
+        self.max_latency = 0.0
+        self.rate_limit_remaining = None
+
+    def record(self, latency, response_bytes, status, rate_limit_remaining=None):
+        with self._lock:
+            self.requests += 1
+            if status >= 400:
+                self.errors += 1
+            self.bytes += response_bytes
+            self.latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            if rate_limit_remaining is not None:
+                self.rate_limit_remaining = int(rate_limit_remaining)
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def hook(self, response, *args, **kwargs):
+        """requests response hook, e.g. session.hooks["response"].append(stats.hook)."""
+        self.record(
+            response.elapsed.total_seconds(), len(response.content), response.status_code,
+            response.headers.get(RATE_LIMIT_HEADER)
+        )
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "retries": self.retries,
+                "bytes": self.bytes,
+                "latencyMs": round(1000 * self.latency),
+                "maxLatencyMs": round(1000 * self.max_latency),
+                "rateLimitRemaining": self.rate_limit_remaining
+            }
+
+
+class RunMetrics(RequestStats):
+    """Request totals of an export run, plus where its time went and how many records it wrote."""
+
+    def __init__(self):
+        super(RunMetrics, self).__init__()
+        self.started = time.time()
+        self.records = 0
+        self.timings = {"fetch": 0.0, "parse": 0.0, "write": 0.0}
+
+    def add_timing(self, name, seconds):
+        # Timings of concurrent exports add up, so they can exceed the run's duration
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, name):
+        started = time.time()
+        try:
+            yield
+        finally:
+            self.add_timing(name, time.time() - started)
+
+    def add_records(self, count):
+        with self._lock:
+            self.records += count
+
+    def summary(self):
+        summary = self.snapshot()
+        duration = time.time() - self.started
+        with self._lock:
+            summary["records"] = self.records
+            summary["durationMs"] = round(1000 * duration)
+            summary["recordsPerSecond"] = round(self.records / duration, 1) if duration else None
+            for name, elapsed in self.timings.items():
+                summary[f"{name}Ms"] = round(1000 * elapsed)
+        return summary
+
+    def emit(self, dataset=None):
+        """Logs the run summary as one JSON line and saves it as metrics of dataset, if given."""
+        summary = self.summary()
+        logger.info("HubSpot run metrics " + json.dumps(summary, sort_keys=True))
+        if dataset is not None:
+            try:
+                dataset.save_external_metric_values(
+                    {f"hubspot:{name}": value for name, value in summary.items() if value is not None}
+                )
+            except Exception as e:
+                logger.warning(f"Could not save HubSpot run metrics: {e}")
+        return summary
+
+
+_request_stats = {}
+_request_stats_lock = threading.Lock()
+
+
+def get_request_stats(name):
+    """Returns the process-wide request totals of one tool or component."""
+    with _request_stats_lock:
+        stats = _request_stats.get(name)
+        if stats is None:
+            stats = _request_stats[name] = RequestStats()
+        return stats
+
+
+class _NullSpan(object):
+    def __init__(self):
+        self.attributes = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def _describe(result):
+    # Per-call attributes derived from the tool response
+    output = result.get("output") if isinstance(result, dict) else None
+    attributes = {"isError": bool(result.get("isError")) if isinstance(result, dict) else False}
+    if isinstance(output, dict):
+        results = output.get("results")
+        if isinstance(results, (list, dict)):
+            attributes["results"] = len(results)
+        attributes["partial"] = bool(output.get("partial"))
+        attributes["truncated"] = bool(output.get("truncated"))
+    sources = result.get("sources") if isinstance(result, dict) else None
+    if sources:
+        attributes["outputChars"] = sum(
+            len(item.get("content") or "") for source in sources for item in source.get("items", [])
+        )
+    return attributes
+
+
+@contextmanager
+def _tool_span(trace, name, stats):
+    before = stats.snapshot()
+    started = time.time()
+    span = trace.subspan(f"hubspot-{name}") if trace is not None else _NullSpan()
+    with span as current:
+        outcome = {}
+        yield outcome
+        after = stats.snapshot()
+        # Requests of concurrent calls to the same tool are included as well
+        attributes = dict(
+            _describe(outcome.get("result")),
+            durationMs=round(1000 * (time.time() - started)),
+            requests=after["requests"] - before["requests"],
+            requestErrors=after["errors"] - before["errors"],
+            requestBytes=after["bytes"] - before["bytes"],
+            requestLatencyMs=after["latencyMs"] - before["latencyMs"],
+            rateLimitRemaining=after["rateLimitRemaining"]
+        )
+        for key, value in attributes.items():
+            current.attributes[f"hubspot.{key}"] = value
+        logger.info(f"HubSpot tool call {name} " + json.dumps(attributes, sort_keys=True))
+
+
+def traced(name):
+    """Wraps a tool's invoke() in a trace span carrying its timings and request totals.
+
+    The tool must expose its RequestStats as self.request_stats.
+    """
+    def decorate(invoke):
+        @functools.wraps(invoke)
+        def wrapper(self, input, trace):
+            with _tool_span(trace, name, self.request_stats) as outcome:
+                outcome["result"] = invoke(self, input, trace)
+            return outcome["result"]
+        return wrapper
+    return decorate
+
+
+def atraced(name):
+    """Asyncio counterpart of traced(), for ainvoke()."""
+    def decorate(ainvoke):
+        @functools.wraps(ainvoke)
+        async def wrapper(self, input, trace):
+            with _tool_span(trace, name, self.request_stats) as outcome:
+                outcome["result"] = await ainvoke(self, input, trace)
+            return outcome["result"]
+        return wrapper
+    return decorate
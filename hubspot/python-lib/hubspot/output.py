@@ -0,0 +1,130 @@
+import json
+from hubspot.constants import Constants
+
+
+def compact(obj):
+    """Encodes obj as JSON without insignificant whitespace."""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _is_empty(value):
+    return value is None or (isinstance(value, (str, list, dict)) and not value)
+
+
+def project(record):
+    """Returns a copy of record without null or empty fields and properties."""
+    if not isinstance(record, dict):
+        return record
+    projected = {}
+    for key, value in record.items():
+        if key == "properties" and isinstance(value, dict):
+            value = {k: v for k, v in value.items() if not _is_empty(v)}
+        if not _is_empty(value):
+            projected[key] = value
+    return projected
+
+
+def output_budget(config):
+    """Reads a tool's max_output_chars setting, where 0 disables the budget."""
+    max_chars = config.get("max_output_chars", Constants.TOOL_OUTPUT_MAX_CHARS)
+    return Constants.TOOL_OUTPUT_MAX_CHARS if max_chars is None else int(max_chars)
+
+
+def _shrink(record, budget):
+    # Cuts the longest string properties of a record that exceeds the budget on its own,
+    # then drops whole properties, largest first, when cutting is not enough
+    properties = record.get("properties") if isinstance(record, dict) else None
+    if not isinstance(properties, dict):
+        return record
+    properties = dict(properties)
+    shrunk = dict(record, properties=properties)
+    minimum = Constants.TOOL_OUTPUT_MIN_VALUE_CHARS
+    cut, dropped = [], []
+
+    def excess():
+        return len(compact(shrunk)) + 1 - budget
+
+    over = excess()
+    while over > 0:
+        # Only values longer than a cut one (minimum characters plus the ellipsis) can still shrink
+        name = max(
+            (k for k, v in properties.items() if isinstance(v, str) and len(v) > minimum + 1),
+            key=lambda k: len(properties[k]), default=None
+        )
+        if name is None:
+            break
+        value = properties[name]
+        properties[name] = value[:max(minimum, len(value) - over - 1)] + "\u2026"
+        if name not in cut:
+            cut.append(name)
+        shrunk["truncatedProperties"] = cut
+        over = excess()
+
+    while over > 0 and properties:
+        name = max(properties, key=lambda k: len(compact(properties[k])))
+        del properties[name]
+        dropped.append(name)
+        shrunk["droppedProperties"] = dropped
+        over = excess()
+    return shrunk
+
+
+def fit(formatted, max_chars=Constants.TOOL_OUTPUT_MAX_CHARS, offset=0):
+    """Projects formatted["results"] from offset onwards and truncates it to fit within max_chars.
+
+    When records are dropped the result carries truncated=True and a continuation
+    with the resultOffset to pass on the next call. A record exceeding the budget on its
+    own has its longest property values cut and lists them in truncatedProperties, and
+    properties still over the budget are dropped and listed in droppedProperties.
+    A max_chars of 0 disables the budget. The input is never mutated.
+    """
+    results = formatted.get("results")
+    if not isinstance(results, list):
+        return formatted
+
+    records = [project(r) for r in results[offset:]]
+    fitted = dict(formatted, results=records)
+    if not max_chars:
+        return fitted
+
+    sizes = [len(compact(r)) + 1 for r in records]
+    base = len(compact(dict(fitted, results=[])))
+    if base + sum(sizes) <= max_chars:
+        return fitted
+
+    overhead = len(compact({"truncated": True, "continuation": {"resultOffset": offset + len(records), "remaining": len(records)}}))
+    budget = max_chars - base - overhead
+    count, used = 0, 0
+    for size in sizes:
+        if used + size > budget:
+            break
+        used += size
+        count += 1
+    results = records[:count]
+    if not count:
+        # Always make progress, even when a single record exceeds the budget
+        count = 1
+        results = [_shrink(records[0], budget)]
+
+    return dict(
+        fitted,
+        results=results,
+        truncated=True,
+        continuation={"resultOffset": offset + count, "remaining": len(records) - count}
+    )
+
+
+def tool_response(formatted, description, title, max_chars=Constants.TOOL_OUTPUT_MAX_CHARS, offset=0):
+    """Builds an agent tool response whose source document reuses a single compact encoding."""
+    fitted = fit(formatted, max_chars, offset)
+    return {
+        "output": fitted,
+        "sources": [{
+            "toolCallDescription": description,
+            "items": [{
+                "type": "SIMPLE_DOCUMENT",
+                "title": title,
+                "content": compact(fitted)
+            }]
+        }]
+    }
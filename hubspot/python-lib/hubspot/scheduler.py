@@ -0,0 +1,174 @@
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+from hubspot.constants import Constants
+
+logger = logging.getLogger(__name__)
+
+
+class RateBudget(object):
+    """Token bucket shared by every request to one portal, paused when HubSpot answers 429."""
+
+    def __init__(self, requests=Constants.PORTAL_BURST_REQUESTS, seconds=Constants.PORTAL_BURST_SECONDS):
+        self.capacity = requests
+        self.rate = requests / float(seconds)
+        self._tokens = float(requests)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        # Returns how long to wait before retrying, or 0 once a token has been taken
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Blocks until the portal's budget allows one more request."""
+        delay = self._reserve()
+        while delay > 0:
+            time.sleep(delay)
+            delay = self._reserve()
+
+    def pause(self, seconds):
+        """Holds back every request to the portal, e.g. for the Retry-After of a 429."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class _Done(object):
+    def __init__(self, key, error=None):
+        self.key = key
+        self.error = error
+
+
+class ExportScheduler(object):
+    """Advances several page iterators on a pool of worker threads, highest priority first.
+
+    Each iterator is only ever advanced by one worker at a time, so cursor-based paging stays
+    sequential per export while different exports run concurrently. Exports sharing a gate
+    (e.g. the AdaptiveController of a portal) are only advanced while gate.try_acquire() grants
+    a slot. Pages are handed back to the calling thread by run(), which keeps dataset writers
+    single-threaded.
+    """
+
+    def __init__(self, max_workers=Constants.EXPORT_MAX_WORKERS):
+        self.max_workers = max_workers
+        self._jobs = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._remaining = 0
+        self._stopped = False
+
+    def add(self, key, pages, priority=0, gate=None):
+        """Schedules an iterator of pages; lower priority values are served first."""
+        with self._condition:
+            heapq.heappush(self._jobs, (priority, next(self._sequence), key, iter(pages), gate))
+            self._remaining += 1
+            self._condition.notify()
+
+    def _next_job(self):
+        with self._condition:
+            while not self._stopped:
+                # Highest priority job whose gate has a free slot; the others keep their place
+                job, skipped = None, []
+                while self._jobs:
+                    candidate = heapq.heappop(self._jobs)
+                    gate = candidate[4]
+                    if gate is None or gate.try_acquire():
+                        job = candidate
+                        break
+                    skipped.append(candidate)
+                for candidate in skipped:
+                    heapq.heappush(self._jobs, candidate)
+                if job is not None:
+                    return job
+                if not self._remaining:
+                    return None
+                self._condition.wait()
+            return None
+
+    def _work(self, pages_out):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            priority, _, key, pages, gate = job
+            try:
+                page = next(pages)
+            except StopIteration:
+                self._release(gate)
+                self._finish(pages_out, _Done(key))
+                continue
+            except Exception as e:
+                self._release(gate)
+                self._finish(pages_out, _Done(key, e))
+                continue
+            self._release(gate)
+            pages_out.put((key, page))
+            with self._condition:
+                # Requeued behind jobs of the same priority so they take turns
+                heapq.heappush(self._jobs, (priority, next(self._sequence), key, pages, gate))
+                self._condition.notify()
+
+    def _release(self, gate):
+        if gate is None:
+            return
+        with self._condition:
+            gate.release()
+            # Waiting workers may now take the slot, or more if the gate's limit grew
+            self._condition.notify_all()
+
+    def _finish(self, pages_out, done):
+        with self._condition:
+            self._remaining -= 1
+            self._condition.notify_all()
+        pages_out.put(done)
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def run(self):
+        """Yields (key, page) as pages arrive, re-raising the first export error."""
+        # A bounded queue keeps at most a few pages in memory when writing is the bottleneck
+        pages_out = queue.Queue(maxsize=2 * self.max_workers)
+        with self._condition:
+            remaining = self._remaining
+        workers = [
+            threading.Thread(target=self._work, args=(pages_out,), name=f"hubspot-export-{i}", daemon=True)
+            for i in range(min(self.max_workers, remaining))
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            while remaining:
+                item = pages_out.get()
+                if isinstance(item, _Done):
+                    remaining -= 1
+                    if item.error is not None:
+                        logger.error(f"Export {item.key} failed: {item.error}")
+                        raise item.error
+                    logger.info(f"Export {item.key} finished")
+                    continue
+                yield item
+        finally:
+            self.stop()
+            # Unblocks workers waiting on a full queue so they can exit
+            while any(worker.is_alive() for worker in workers):
+                try:
+                    pages_out.get(timeout=0.1)
+                except queue.Empty:
+                    pass
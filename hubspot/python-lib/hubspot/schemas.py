@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import requests
+from hubspot.constants import Constants
+from hubspot.metrics import get_request_stats
+
+logger = logging.getLogger(__name__)
+
+HUBSPOT_API_HOST = Constants.API_HOST
+
+
+class SchemaRegistry(object):
+    """Lazily loaded view of a portal's custom object schemas, refreshed in the background.
+
+    peek() never blocks and may return None until the first load completes;
+    get() only waits when nothing has been loaded yet.
+    """
+
+    def __init__(self, access_token, refresh_interval=Constants.SCHEMA_REFRESH_SECONDS,
+                 retry_interval=Constants.SCHEMA_RETRY_SECONDS):
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.access_token = access_token
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json"
+        })
+        self.stats = get_request_stats("schemas")
+        self.session.hooks["response"].append(self.stats.hook)
+        self._lock = threading.Lock()
+        self._schemas = None
+        self._loaded_at = None
+        self._failed_at = None
+        self._error = None
+        self._refreshing = None
+        # First loads started from ainvoke, one per event loop
+        self._async_loads = {}
+
+    def _is_fresh(self):
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_interval
+
+    def _recently_failed(self):
+        return self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_interval
+
+    def _start_refresh(self):
+        # Must be called with the lock held; at most one refresh runs at a time
+        if self._refreshing is None:
+            self._refreshing = threading.Event()
+            threading.Thread(target=self._refresh, name="hubspot-schema-refresh", daemon=True).start()
+        return self._refreshing
+
+    def _refresh(self):
+        try:
+            r = self.session.get(f"{HUBSPOT_API_HOST}/crm/v3/schemas", timeout=30)
+            r.raise_for_status()
+            results = r.json().get("results", [])
+            with self._lock:
+                self._schemas = results
+                self._loaded_at = time.monotonic()
+                self._failed_at = None
+                self._error = None
+        except Exception as e:
+            logger.debug(f"Could not fetch schemas list from HubSpot: {e}")
+            with self._lock:
+                self._failed_at = time.monotonic()
+                self._error = e
+        finally:
+            with self._lock:
+                done, self._refreshing = self._refreshing, None
+            done.set()
+
+    def peek(self):
+        """Returns the last known schemas (or None) and schedules a refresh if they are stale."""
+        with self._lock:
+            if not self._is_fresh() and not self._recently_failed():
+                self._start_refresh()
+            return self._schemas
+
+    def get(self, timeout=30):
+        """Returns the schemas, waiting for the first load if nothing has been loaded yet."""
+        with self._lock:
+            if self._schemas is not None:
+                # Stale data is served while a background refresh catches up
+                if not self._is_fresh() and not self._recently_failed():
+                    self._start_refresh()
+                return self._schemas
+            done = self._start_refresh()
+        done.wait(timeout)
+        with self._lock:
+            if self._schemas is None:
+                raise Exception(f"Could not load HubSpot schemas: {self._error or 'timed out'}")
+            return self._schemas
+
+    async def aget(self, timeout=30):
+        """Asyncio counterpart of get(); concurrent first loads on a loop share one request."""
+        loop = asyncio.get_event_loop()
+        with self._lock:
+            if self._schemas is not None:
+                if not self._is_fresh() and not self._recently_failed():
+                    self._start_refresh()
+                return self._schemas
+            load = self._async_loads.get(loop)
+            if load is None:
+                load = self._async_loads[loop] = asyncio.ensure_future(self._aload(loop, timeout))
+                # Marks the exception as retrieved when every caller has timed out
+                load.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return await asyncio.wait_for(asyncio.shield(load), timeout)
+
+    async def _aload(self, loop, timeout):
+        from hubspot.aio import AsyncHubspotClient
+
+        try:
+            with self._lock:
+                refreshing = self._refreshing
+            if refreshing is not None:
+                # A background load is already in flight: wait for it without blocking the loop
+                await loop.run_in_executor(None, refreshing.wait, timeout)
+                with self._lock:
+                    if self._schemas is not None:
+                        return self._schemas
+
+            data = await AsyncHubspotClient(self.access_token, self.stats).get("/crm/v3/schemas", timeout=timeout)
+            results = data.get("results", [])
+            with self._lock:
+                self._schemas = results
+                self._loaded_at = time.monotonic()
+                self._failed_at = None
+                self._error = None
+            return results
+        finally:
+            with self._lock:
+                self._async_loads.pop(loop, None)
+
+    def object_type_names(self):
+        """Returns the sorted schema names known so far, without blocking."""
+        schemas = self.peek()
+        if not schemas:
+            return None
+        return sorted(s["name"] for s in schemas)
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_schema_registry(access_token):
+    """Returns the process-wide registry for the portal behind access_token."""
+    fingerprint = hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+    with _registries_lock:
+        registry = _registries.get(fingerprint)
+        if registry is None:
+            registry = _registries[fingerprint] = SchemaRegistry(access_token)
+        return registry
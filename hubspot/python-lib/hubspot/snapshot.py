@@ -0,0 +1,423 @@
+import asyncio
+import datetime
+import json
+import logging
+import math
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    object_type TEXT NOT NULL,
+    id TEXT NOT NULL,
+    created_at TEXT,
+    updated_at TEXT,
+    properties TEXT NOT NULL,
+    PRIMARY KEY (object_type, id)
+);
+CREATE TABLE IF NOT EXISTS property_values (
+    object_type TEXT NOT NULL,
+    id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (object_type, id, name)
+);
+CREATE INDEX IF NOT EXISTS property_values_lookup ON property_values (object_type, name, value);
+CREATE TABLE IF NOT EXISTS snapshots (
+    object_type TEXT PRIMARY KEY,
+    refreshed_at REAL NOT NULL,
+    record_count INTEGER NOT NULL,
+    property_names TEXT NOT NULL
+);
+"""
+
+# v1/v2 export endpoints name the record id and last-modified property differently per object
+ID_FIELDS = {"contacts": "vid", "companies": "companyId"}
+UPDATED_PROPERTIES = ("lastmodifieddate", "hs_lastmodifieddate")
+
+# Properties the v3 API returns when a request does not list any
+DEFAULT_PROPERTIES = {
+    "contacts": ("createdate", "email", "firstname", "hs_object_id", "lastmodifieddate", "lastname"),
+    "companies": ("createdate", "domain", "hs_lastmodifieddate", "hs_object_id", "name")
+}
+OTHER_DEFAULT_PROPERTIES = ("createdate", "hs_lastmodifieddate", "hs_object_id")
+
+# The v1/v2 exports carry no property types; HubSpot names its date and datetime properties with
+# these suffixes (createdate, closedate, hs_lifecyclestage_lead_date, ...), and their values are epoch millis
+DATE_SUFFIXES = ("date", "_timestamp")
+
+# Text in the SQL below is compared case-insensitively, like HubSpot's search. hs_number() is NULL
+# for values that are neither numbers nor ISO dates, which compare as text instead.
+NUMERIC = "hs_number(pv.value)"
+TEXT = "lower(pv.value)"
+
+# Paging cursors issued by the snapshot, never valid for the live API and vice versa
+CURSOR_PREFIX = "snap:"
+
+ISO_DATE = re.compile(
+    r"^(\d{4})-(\d{2})-(\d{2})(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d{1,6})\d*)?)?)?(Z|[+-]\d{2}:?\d{2})?$"
+)
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class UnsupportedQuery(Exception):
+    """Raised when a search cannot be answered faithfully from the snapshot."""
+
+
+def _iso(millis):
+    if not millis:
+        return None
+    try:
+        moment = datetime.datetime.fromtimestamp(int(millis) / 1000.0, tz=datetime.timezone.utc)
+    except (TypeError, ValueError):
+        return str(millis)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _to_number(value):
+    """Returns value as a number, with ISO dates as epoch milliseconds like the v1/v2 exports, or None."""
+    if _is_number(value):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    try:
+        number = float(value)
+        return number if math.isfinite(number) else None
+    except ValueError:
+        pass
+    match = ISO_DATE.match(value.strip())
+    if not match:
+        return None
+    year, month, day, hour, minute, second, fraction, zone = match.groups()
+    offset = datetime.timedelta(0)
+    if zone and zone != "Z":
+        digits = zone[1:].replace(":", "")
+        offset = datetime.timedelta(hours=int(digits[:2]), minutes=int(digits[2:]))
+        offset = -offset if zone[0] == "-" else offset
+    try:
+        moment = datetime.datetime(
+            int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0),
+            int((fraction or "0").ljust(6, "0")), tzinfo=datetime.timezone.utc
+        )
+    except ValueError:
+        return None
+    return round((moment - offset - EPOCH).total_seconds() * 1000)
+
+
+def _offset(after):
+    if not after:
+        return 0
+    after = str(after)
+    if after.startswith(CURSOR_PREFIX) and after[len(CURSOR_PREFIX):].isdigit():
+        return int(after[len(CURSOR_PREFIX):])
+    raise UnsupportedQuery("Paging cursors of the live API can only be continued there")
+
+
+def _like(token):
+    # HubSpot tokens only use * as a wildcard, so LIKE's own wildcards are matched literally
+    escaped = token.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return "%" + escaped.replace("*", "%") + "%"
+
+
+def _render(name, value):
+    # Dates are returned as ISO strings, like the v3 API
+    if isinstance(value, str) and value.isdigit() and name.endswith(DATE_SUFFIXES):
+        return _iso(value)
+    return value
+
+
+def check_live_cursor(after):
+    """Raises ValueError for a snapshot paging cursor that is about to be sent to the live API."""
+    if after and str(after).startswith(CURSOR_PREFIX):
+        raise ValueError(
+            "The after cursor was issued by the local snapshot, which can no longer answer this query; "
+            "repeat the call without after"
+        )
+
+
+def _normalize(object_type, record):
+    """Flattens a v1/v2 export record into (id, created_at, updated_at, properties)."""
+    record_id = str(record.get(ID_FIELDS.get(object_type, "id")))
+    properties = {}
+    for name, value in record.get("properties", {}).items():
+        properties[name] = value.get("value") if isinstance(value, dict) else value
+    properties["hs_object_id"] = record_id
+    updated = next((properties[p] for p in UPDATED_PROPERTIES if properties.get(p)), None)
+    # Contacts also carry the time they were added to the portal, for exports without createdate
+    created = properties.get("createdate") or record.get("addedAt")
+    return record_id, _iso(created), _iso(updated), properties
+
+
+class SnapshotStore(object):
+    """Indexed SQLite snapshot of exported HubSpot records, queried by the agent tools.
+
+    The export recipe writes it with upsert()/finish(); tools call search() and read()
+    when is_fresh() and fall back to the live API on UnsupportedQuery.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+            conn.create_function("hs_number", 1, _to_number)
+            # WAL lets the tools keep reading while the recipe refreshes the snapshot
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (object_type TEXT, id TEXT, PRIMARY KEY (object_type, id))")
+        return conn
+
+    # Writing (export recipe)
+
+    def upsert(self, object_type, records):
+        """Writes a page of exported records, skipping those whose last-modified date is unchanged."""
+        rows = [_normalize(object_type, record) for record in records]
+        if not rows:
+            return 0
+        conn = self._connection()
+        with conn:
+            ids = [row[0] for row in rows]
+            conn.executemany("INSERT OR IGNORE INTO seen VALUES (?, ?)", [(object_type, i) for i in ids])
+            placeholders = ",".join("?" * len(ids))
+            known = dict(conn.execute(
+                f"SELECT id, updated_at FROM records WHERE object_type = ? AND id IN ({placeholders})",
+                [object_type] + ids
+            ))
+            changed = [row for row in rows if row[0] not in known or row[2] is None or known[row[0]] != row[2]]
+            if not changed:
+                return 0
+            changed_ids = [row[0] for row in changed]
+            placeholders = ",".join("?" * len(changed_ids))
+            conn.execute(
+                f"DELETE FROM property_values WHERE object_type = ? AND id IN ({placeholders})",
+                [object_type] + changed_ids
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)",
+                [(object_type, i, created, updated, json.dumps(props)) for i, created, updated, props in changed]
+            )
+            conn.executemany(
+                "INSERT INTO property_values VALUES (?, ?, ?, ?)",
+                [
+                    (object_type, i, name, None if value is None else str(value))
+                    for i, _, _, props in changed
+                    for name, value in props.items()
+                ]
+            )
+        return len(changed)
+
+    def finish(self, object_type):
+        """Drops records not seen during this export and marks the snapshot as refreshed."""
+        conn = self._connection()
+        with conn:
+            stale = "SELECT id FROM records WHERE object_type = ? AND id NOT IN (SELECT id FROM seen WHERE object_type = ?)"
+            conn.execute(f"DELETE FROM property_values WHERE object_type = ? AND id IN ({stale})", (object_type,) * 3)
+            conn.execute(f"DELETE FROM records WHERE object_type = ? AND id IN ({stale})", (object_type,) * 3)
+            conn.execute("DELETE FROM seen WHERE object_type = ?", (object_type,))
+            count = conn.execute("SELECT COUNT(*) FROM records WHERE object_type = ?", (object_type,)).fetchone()[0]
+            # Queries on properties the export did not include must go to the live API
+            names = [row[0] for row in conn.execute(
+                "SELECT DISTINCT name FROM property_values WHERE object_type = ?", (object_type,)
+            )]
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)",
+                (object_type, time.time(), count, json.dumps(names))
+            )
+        return count
+
+    # Reading (agent tools)
+
+    def refreshed_at(self, object_type):
+        row = self._connection().execute(
+            "SELECT refreshed_at FROM snapshots WHERE object_type = ?", (object_type,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _check_properties(self, object_type, names):
+        row = self._connection().execute(
+            "SELECT property_names FROM snapshots WHERE object_type = ?", (object_type,)
+        ).fetchone()
+        missing = set(names) - set(json.loads(row[0]) if row else [])
+        if missing:
+            raise UnsupportedQuery(f"Properties not in the snapshot: {', '.join(sorted(missing))}")
+
+    def is_fresh(self, object_type, max_age_minutes):
+        refreshed_at = self.refreshed_at(object_type)
+        return refreshed_at is not None and time.time() - refreshed_at <= max_age_minutes * 60
+
+    def _properties(self, object_type, properties):
+        """Returns the properties to return, the live API's default set when none are listed."""
+        return list(properties or DEFAULT_PROPERTIES.get(object_type, OTHER_DEFAULT_PROPERTIES))
+
+    def _format(self, object_type, rows, properties):
+        results = []
+        for record_id, created_at, updated_at, props in rows:
+            props = json.loads(props)
+            props = {name: _render(name, props.get(name)) for name in properties}
+            results.append({
+                "id": record_id,
+                "properties": props,
+                "createdAt": created_at,
+                "updatedAt": updated_at,
+                "archived": False,
+                "archivedAt": None
+            })
+        return results
+
+    def _snapshot_info(self, object_type):
+        refreshed_at = self.refreshed_at(object_type)
+        return {"source": "snapshot", "refreshedAt": _iso(refreshed_at * 1000) if refreshed_at else None}
+
+    def _filter_sql(self, f):
+        name, operator = f.get("propertyName"), f.get("operator")
+        value, values, high = f.get("value"), f.get("values"), f.get("highValue")
+        exists = "EXISTS (SELECT 1 FROM property_values pv WHERE pv.object_type = r.object_type AND pv.id = r.id AND pv.name = ? AND {})"
+
+        def compare(op, operand):
+            # Numbers, numeric strings and ISO dates compare numerically with stored numbers and dates
+            number = _to_number(operand)
+            if number is None:
+                return f"{TEXT} {op} lower(?)", [str(operand)]
+            return f"CASE WHEN {NUMERIC} IS NULL THEN {TEXT} {op} lower(?) ELSE {NUMERIC} {op} ? END", [str(operand), number]
+
+        if operator in ("EQ", "NEQ") and value is not None:
+            condition, params = compare("=", value)
+            sql = exists.format(condition)
+            return (sql if operator == "EQ" else f"NOT {sql}"), [name] + params
+        if operator in ("LT", "LTE", "GT", "GTE") and value is not None:
+            op = {"LT": "<", "LTE": "<=", "GT": ">", "GTE": ">="}[operator]
+            condition, params = compare(op, value)
+            return exists.format(condition), [name] + params
+        if operator == "BETWEEN" and value is not None and high is not None:
+            low_condition, low_params = compare(">=", value)
+            high_condition, high_params = compare("<=", high)
+            return exists.format(f"{low_condition} AND {high_condition}"), [name] + low_params + high_params
+        if operator in ("IN", "NOT_IN") and values:
+            # Each value matches like EQ, so numbers compare numerically here too
+            conditions = [compare("=", v) for v in values]
+            sql = exists.format("(" + " OR ".join(condition for condition, _ in conditions) + ")")
+            params = [name] + [p for _, condition_params in conditions for p in condition_params]
+            return (sql if operator == "IN" else f"NOT {sql}"), params
+        if operator in ("HAS_PROPERTY", "NOT_HAS_PROPERTY"):
+            sql = exists.format("pv.value IS NOT NULL AND pv.value != ''")
+            return (sql if operator == "HAS_PROPERTY" else f"NOT {sql}"), [name]
+        if operator in ("CONTAINS_TOKEN", "NOT_CONTAINS_TOKEN") and value is not None:
+            sql = exists.format(f"{TEXT} LIKE ? ESCAPE '\\'")
+            return (sql if operator == "CONTAINS_TOKEN" else f"NOT {sql}"), [name, _like(str(value).lower())]
+        raise UnsupportedQuery(f"Filter {operator} on {name} is not supported by the snapshot")
+
+    def search(self, object_type, request_body):
+        """Answers a CRM search request body ({filterGroups, sorts, properties, limit, after}) locally."""
+        if request_body.get("query"):
+            raise UnsupportedQuery("Free-text queries are only supported by the live API")
+        filters = [f for group in request_body.get("filterGroups", []) for f in group.get("filters", [])]
+        properties = self._properties(object_type, request_body.get("properties"))
+        self._check_properties(object_type, (
+            [f.get("propertyName") for f in filters]
+            + [sort.get("propertyName") for sort in request_body.get("sorts", [])]
+            + properties
+        ))
+
+        where, params = ["r.object_type = ?"], [object_type]
+        groups = []
+        for group in request_body.get("filterGroups", []):
+            clauses = [self._filter_sql(f) for f in group.get("filters", [])]
+            if clauses:
+                groups.append("(" + " AND ".join(sql for sql, _ in clauses) + ")")
+                params.extend(p for _, clause_params in clauses for p in clause_params)
+        if groups:
+            where.append("(" + " OR ".join(groups) + ")")
+
+        order, order_params = [], []
+        for sort in request_body.get("sorts", []):
+            direction = "DESC" if sort.get("direction") == "DESCENDING" else "ASC"
+            # Numbers and dates sort as numbers, like HubSpot's number and date properties
+            order.append(
+                f"(SELECT coalesce({NUMERIC}, {TEXT}) FROM property_values pv "
+                f"WHERE pv.object_type = r.object_type AND pv.id = r.id AND pv.name = ?) {direction}"
+            )
+            order_params.append(sort.get("propertyName"))
+        order.append("CAST(r.id AS INTEGER) ASC")
+
+        limit = int(request_body.get("limit", 10))
+        offset = _offset(request_body.get("after"))
+        rows = self._connection().execute(
+            f"SELECT r.id, r.created_at, r.updated_at, r.properties FROM records r "
+            f"WHERE {' AND '.join(where)} ORDER BY {', '.join(order)} LIMIT ? OFFSET ?",
+            params + order_params + [limit + 1, offset]
+        ).fetchall()
+
+        paging = {}
+        if len(rows) > limit:
+            rows = rows[:limit]
+            paging = {"next": {"after": f"{CURSOR_PREFIX}{offset + limit}"}}
+        return {
+            "results": self._format(object_type, rows, properties),
+            "paging": paging,
+            "snapshot": self._snapshot_info(object_type)
+        }
+
+    def read(self, object_type, ids, properties=None):
+        """Reads records by id, raising UnsupportedQuery if any of them is missing from the snapshot."""
+        ids = [str(i) for i in ids]
+        properties = self._properties(object_type, properties)
+        self._check_properties(object_type, properties)
+        placeholders = ",".join("?" * len(ids))
+        rows = self._connection().execute(
+            f"SELECT id, created_at, updated_at, properties FROM records WHERE object_type = ? AND id IN ({placeholders})",
+            [object_type] + ids
+        ).fetchall()
+        if len(rows) != len(set(ids)):
+            raise UnsupportedQuery("Some ids are not in the snapshot")
+        by_id = {row[0]: row for row in rows}
+        return {
+            "results": self._format(object_type, [by_id[i] for i in ids if i in by_id], properties),
+            "paging": {},
+            "snapshot": self._snapshot_info(object_type)
+        }
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_snapshot_store(path):
+    """Returns the process-wide store for the snapshot database at path."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = SnapshotStore(path)
+        return store
+
+
+def query_snapshot(store, max_age_minutes, object_type, query):
+    """Runs query() against a fresh snapshot, returning None when the live API must be used instead."""
+    if store is None or not store.is_fresh(object_type, max_age_minutes):
+        return None
+    try:
+        return query()
+    except UnsupportedQuery as e:
+        logger.debug(f"Falling back to HubSpot for {object_type}: {e}")
+        return None
+
+
+async def arun_snapshot(store, function, *args):
+    """Runs a tool's blocking snapshot lookup function(*args) on the loop's default executor.
+
+    Returns None, like query_snapshot(), when no snapshot is configured.
+    """
+    if store is None:
+        return None
+    return await asyncio.get_event_loop().run_in_executor(None, function, *args)
@@ -0,0 +1,53 @@
+import asyncio
+import hashlib
+import threading
+import time
+from hubspot.constants import Constants
+from hubspot.deadline import DeadlineExceeded
+
+
+class SearchThrottle(object):
+    """Spaces out the search calls of one HubSpot account, from any thread or event loop.
+
+    HubSpot's search endpoints are limited per account, so every tool instance and agent
+    session using the same token shares one throttle (see get_search_throttle).
+    """
+
+    def __init__(self, min_interval=Constants.SEARCH_MIN_INTERVAL_SECONDS):
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, deadline):
+        """Reserves the next search slot and returns the delay until it, or raises DeadlineExceeded."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            if slot - now > deadline.remaining():
+                raise DeadlineExceeded(f"Deadline of {deadline.seconds:g}s exceeded")
+            self._next_slot = slot + self.min_interval
+        return slot - now
+
+    def wait(self, deadline):
+        delay = self.reserve(deadline)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def await_slot(self, deadline):
+        delay = self.reserve(deadline)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_throttles = {}
+_throttles_lock = threading.Lock()
+
+
+def get_search_throttle(access_token):
+    """Returns the process-wide search throttle of the account behind access_token."""
+    fingerprint = hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+    with _throttles_lock:
+        throttle = _throttles.get(fingerprint)
+        if throttle is None:
+            throttle = _throttles[fingerprint] = SearchThrottle()
+        return throttle
@@ -1,19 +1,29 @@
-import dataiku
-import pandas as pd, numpy as np
-from dataiku import pandasutils as pdu
 import json
 import logging
-from pandas.io.json import json_normalize
 
 logger = logging.getLogger(__name__)
 
-def write_data_json(writer, json_line, output_dataset, format_output):  
+def write_data_json(writer, json_line, output_dataset, format_output, dimensions=None):  
     output_dataset.write_schema([{"name": "object","type": "string"}])
+    if dimensions:
+        dimensions.label_page(json_line)
     for list_objects in json_line:
         logger.info("Writing to output as JSON")
         writer.write_row_array([json.dumps(list_objects)])   
              
-def write_data_columns(json_line, output_dataset, format_output):
+def write_data_columns(json_line, output_dataset, format_output, dimensions=None):
+        # pandas is only loaded by the column output, keeping the JSON path and the agent tools light
+        from pandas.io.json import json_normalize
+
         output_result = json_normalize(json_line)
+        if dimensions:
+            dimensions.label_columns(output_result)
         logger.info("Writing to output")
-        output_dataset.write_with_schema(output_result)
\ No newline at end of file
+        output_dataset.write_with_schema(output_result)
+
+def write_data_tagged(writer, json_line, portal, object_name, dimensions=None):
+    # Orchestrated exports share one dataset, so each row records where it came from
+    if dimensions:
+        dimensions.label_page(json_line)
+    for list_objects in json_line:
+        writer.write_row_array([portal, object_name, json.dumps(list_objects)])
\ No newline at end of file
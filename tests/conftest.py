@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The plugin library is shipped as hubspot/python-lib, which DSS puts on the path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hubspot", "python-lib"))
@@ -0,0 +1,56 @@
+from hubspot.adaptive import AdaptiveController
+from hubspot.constants import Constants
+
+
+def test_page_size_starts_small_and_grows_towards_the_byte_target():
+    controller = AdaptiveController(target_bytes=100 * 1000)
+    sizes = []
+    for _ in range(10):
+        size = controller.page_size("contacts")
+        sizes.append(size)
+        controller.observe_page("contacts", size * 1000, size, latency=0.1)
+    assert sizes[0] == Constants.ADAPTIVE_INITIAL_PAGE_SIZE
+    assert sizes == sorted(sizes)
+    assert sizes[-1] == Constants.CONTACTS_LIMIT
+
+
+def test_page_size_follows_large_records_down():
+    controller = AdaptiveController(target_bytes=50 * 1000)
+    controller.observe_page("companies", 20 * 5000, 20, latency=0.1)
+    assert controller.page_size("companies") == Constants.ADAPTIVE_MIN_PAGE_SIZE
+
+
+def test_slow_responses_and_backoffs_halve_the_page_size():
+    controller = AdaptiveController(target_latency=1)
+    controller.observe_page("companies", 1000, 20, latency=0.1)
+    grown = controller.page_size("companies")
+    controller.observe_page("companies", 1000, grown, latency=2)
+    assert controller.page_size("companies") == grown // 2
+    controller.backoff("companies", 0.1, "429")
+    assert controller.page_size("companies") == max(Constants.ADAPTIVE_MIN_PAGE_SIZE, grown // 4)
+
+
+def test_concurrency_grows_by_one_per_healthy_round_and_halves_on_backoff():
+    controller = AdaptiveController(max_concurrency=4)
+    limits = []
+    for _ in range(12):
+        limits.append(controller.concurrency)
+        controller.observe_page("contacts", 1000, 10, latency=0.1)
+    assert limits[:7] == [1, 2, 2, 3, 3, 3, 4]
+    assert controller.concurrency == 4
+    controller.backoff("contacts", 0.1, "timeout")
+    assert controller.concurrency == 2
+    # Requests already in flight when congestion started only count once
+    controller.backoff("contacts", 5, "429")
+    assert controller.concurrency == 2
+
+
+def test_slots_are_limited_to_the_current_concurrency():
+    controller = AdaptiveController(max_concurrency=4)
+    assert controller.try_acquire()
+    assert not controller.try_acquire()
+    controller.observe_page("contacts", 1000, 10, latency=0.1)
+    assert controller.try_acquire()
+    controller.release()
+    controller.release()
+    assert controller.try_acquire()
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from hubspot.cache import ResponseCache, make_key
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_values_expire_after_their_ttl():
+    cache = ResponseCache(ttl=0.05)
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)
+    assert cache.get_or_compute("k", compute) == 1
+    assert cache.get_or_compute("k", compute) == 1
+    time.sleep(0.06)
+    assert cache.get_or_compute("k", compute) == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.get_or_compute("a", lambda: 1)
+    cache.get_or_compute("b", lambda: 2)
+    cache.get_or_compute("a", lambda: None)
+    cache.get_or_compute("c", lambda: 3)
+    assert cache.get_or_compute("a", lambda: "recomputed") == 1
+    assert cache.get_or_compute("b", lambda: "recomputed") == "recomputed"
+    assert cache.stats()["evictions"] >= 1
+
+
+def test_concurrent_identical_calls_share_one_computation():
+    cache = ResponseCache()
+    calls = []
+    started = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(5)]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["value"] * 5
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_failures_are_shared_but_not_cached():
+    cache = ResponseCache()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute("k", fail)
+    assert cache.get_or_compute("k", lambda: "ok") == "ok"
+
+
+def test_waiters_time_out():
+    cache = ResponseCache()
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait()
+        return 1
+
+    owner = threading.Thread(target=cache.get_or_compute, args=("k", compute))
+    owner.start()
+    started.wait()
+    with pytest.raises(TimeoutError):
+        cache.get_or_compute("k", compute, wait_timeout=0.05)
+    release.set()
+    owner.join()
+
+
+def test_async_calls_are_coalesced():
+    cache = ResponseCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def main():
+        return await asyncio.gather(*[cache.aget_or_compute("k", compute) for _ in range(5)])
+
+    assert run(main()) == ["value"] * 5
+    assert len(calls) == 1
+    assert run(cache.aget_or_compute("k", compute)) == "value"
+
+
+def test_cancelling_the_first_async_caller_does_not_cancel_the_others():
+    cache = ResponseCache()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def main():
+        owner = asyncio.ensure_future(cache.aget_or_compute("k", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.aget_or_compute("k", compute, wait_timeout=5))
+        await asyncio.sleep(0)
+        owner.cancel()
+        return await waiter
+
+    assert run(main()) == "value"
+
+
+def test_async_failures_reach_every_caller():
+    cache = ResponseCache()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(*[cache.aget_or_compute("k", fail) for _ in range(3)], return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in run(main()))
+    assert run(cache.aget_or_compute("k", lambda: asyncio.sleep(0, "ok"))) == "ok"
+
+
+def test_keys_ignore_argument_order_and_missing_values():
+    assert make_key("tool", "token", {"a": 1, "b": None, "c": 2}) == make_key("tool", "token", {"c": 2, "a": 1})
+    assert make_key("tool", "token", {}) != make_key("tool", "other", {})
+    assert "token" not in make_key("tool", "token", {})
@@ -0,0 +1,63 @@
+from hubspot.constants import Constants
+from hubspot.output import compact, fit, output_budget
+
+
+def records(count, **properties):
+    return {"results": [{"id": str(i), "properties": dict(properties)} for i in range(count)], "paging": {}}
+
+
+def test_fit_within_budget_only_projects():
+    formatted = {"results": [{"id": "1", "properties": {"email": "a@b.c", "phone": None, "city": ""}}]}
+    fitted = fit(formatted, 1000)
+    assert fitted["results"] == [{"id": "1", "properties": {"email": "a@b.c"}}]
+    assert "truncated" not in fitted
+    assert formatted["results"][0]["properties"]["phone"] is None
+
+
+def test_fit_truncates_with_continuation():
+    formatted = records(50, name="x" * 50)
+    fitted = fit(formatted, 1000)
+    count = len(fitted["results"])
+    assert 0 < count < 50
+    assert fitted["truncated"] is True
+    assert fitted["continuation"] == {"resultOffset": count, "remaining": 50 - count}
+    assert len(compact(fitted)) <= 1000
+
+    following = fit(formatted, 1000, fitted["continuation"]["resultOffset"])
+    assert following["results"][0]["id"] == str(count)
+
+
+def test_fit_zero_disables_the_budget():
+    formatted = records(50, name="x" * 50)
+    assert len(fit(formatted, 0)["results"]) == 50
+    assert output_budget({"max_output_chars": 0}) == 0
+    assert output_budget({}) == Constants.TOOL_OUTPUT_MAX_CHARS
+    assert output_budget({"max_output_chars": None}) == Constants.TOOL_OUTPUT_MAX_CHARS
+
+
+def test_fit_cuts_long_values_of_an_oversized_record():
+    formatted = {"results": [{"id": "1", "properties": {"notes": "x" * 5000, "name": "a"}}]}
+    fitted = fit(formatted, 1000)
+    record = fitted["results"][0]
+    assert record["truncatedProperties"] == ["notes"]
+    assert record["properties"]["name"] == "a"
+    assert record["properties"]["notes"].endswith("…")
+    assert len(compact(fitted)) <= 1000
+
+
+def test_fit_drops_properties_when_cutting_is_not_enough():
+    # One wide record in a 25-search batch with the default budget
+    formatted = {"results": [{"id": "1", "properties": {f"p{i}": "v" * 200 for i in range(40)}}]}
+    budget = Constants.TOOL_OUTPUT_MAX_CHARS // 25
+    fitted = fit(formatted, budget)
+    record = fitted["results"][0]
+    assert record["droppedProperties"]
+    assert len(record["properties"]) + len(record["droppedProperties"]) == 40
+    assert len(compact(fitted)) <= budget
+
+
+def test_fit_terminates_when_nothing_can_be_cut():
+    formatted = {"results": [{"id": "x" * 500, "properties": {"a": "b"}}]}
+    fitted = fit(formatted, 100)
+    assert fitted["results"][0]["id"] == "x" * 500
+    assert fitted["results"][0]["properties"] == {}
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+from hubspot.adaptive import AdaptiveController
+from hubspot.scheduler import ExportScheduler, RateBudget
+
+
+def pages(key, count, log=None):
+    for i in range(count):
+        if log is not None:
+            log.append(key)
+        yield f"{key}-{i}"
+
+
+def test_every_page_of_every_export_is_yielded_in_order():
+    scheduler = ExportScheduler(max_workers=3)
+    for key, count in (("a", 5), ("b", 0), ("c", 7)):
+        scheduler.add(key, pages(key, count))
+    by_key = {}
+    for key, page in scheduler.run():
+        by_key.setdefault(key, []).append(page)
+    assert by_key == {"a": [f"a-{i}" for i in range(5)], "c": [f"c-{i}" for i in range(7)]}
+
+
+def test_lower_priority_values_are_served_first():
+    log = []
+    scheduler = ExportScheduler(max_workers=1)
+    scheduler.add("low", pages("low", 3, log), priority=1)
+    scheduler.add("high", pages("high", 3, log), priority=0)
+    list(scheduler.run())
+    assert log == ["high"] * 3 + ["low"] * 3
+
+
+def test_exports_of_the_same_priority_take_turns():
+    log = []
+    scheduler = ExportScheduler(max_workers=1)
+    scheduler.add("a", pages("a", 3, log))
+    scheduler.add("b", pages("b", 3, log))
+    list(scheduler.run())
+    assert log == ["a", "b"] * 3
+
+
+def test_an_iterator_is_never_advanced_concurrently():
+    active, overlaps = set(), []
+    lock = threading.Lock()
+
+    def slow(key):
+        for i in range(5):
+            with lock:
+                if key in active:
+                    overlaps.append(key)
+                active.add(key)
+            time.sleep(0.005)
+            with lock:
+                active.discard(key)
+            yield i
+
+    scheduler = ExportScheduler(max_workers=4)
+    scheduler.add("a", slow("a"))
+    scheduler.add("b", slow("b"))
+    assert len(list(scheduler.run())) == 10
+    assert overlaps == []
+
+
+def test_an_export_error_is_raised_from_run():
+    def failing():
+        yield 1
+        raise ValueError("boom")
+
+    scheduler = ExportScheduler(max_workers=2)
+    scheduler.add("ok", pages("ok", 50))
+    scheduler.add("failing", failing())
+    with pytest.raises(ValueError, match="boom"):
+        list(scheduler.run())
+
+
+def test_rate_budget_spaces_requests_past_the_burst():
+    budget = RateBudget(requests=5, seconds=0.5)
+    started = time.monotonic()
+    for _ in range(5):
+        budget.acquire()
+    assert time.monotonic() - started < 0.05
+    for _ in range(2):
+        budget.acquire()
+    assert time.monotonic() - started >= 0.15
+
+
+def test_rate_budget_pause_holds_back_requests():
+    budget = RateBudget(requests=100, seconds=1)
+    budget.pause(0.1)
+    started = time.monotonic()
+    budget.acquire()
+    assert time.monotonic() - started >= 0.1
+
+
+def test_gated_exports_only_run_within_the_gate_limit():
+    gate = AdaptiveController(max_concurrency=2)
+    active, peaks = [0], []
+    lock = threading.Lock()
+
+    def gated(key):
+        for i in range(10):
+            with lock:
+                active[0] += 1
+                peaks.append(active[0])
+            time.sleep(0.002)
+            with lock:
+                active[0] -= 1
+            gate.observe_page("contacts", 1000, 10, latency=0.002)
+            yield i
+
+    scheduler = ExportScheduler(max_workers=4)
+    for key in range(4):
+        scheduler.add(key, gated(key), gate=gate)
+    assert len(list(scheduler.run())) == 40
+    assert max(peaks) == 2
+    assert peaks[0] == 1
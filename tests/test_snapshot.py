@@ -0,0 +1,177 @@
+import asyncio
+import time
+
+import pytest
+
+from hubspot.snapshot import (
+    CURSOR_PREFIX, SnapshotStore, UnsupportedQuery, arun_snapshot, check_live_cursor, query_snapshot
+)
+
+JAN_2021 = "1609459200000"
+JUN_2021 = "1622505600000"
+JAN_2022 = "1640995200000"
+
+
+def contact(vid, email, amount=None, created=JAN_2021, modified=JAN_2021, **extra):
+    properties = {"email": email, "firstname": email.split("@")[0], "lastname": "Doe",
+                  "createdate": created, "lastmodifieddate": modified}
+    if amount is not None:
+        properties["amount"] = amount
+    properties.update(extra)
+    return {"vid": vid, "properties": {name: {"value": value} for name, value in properties.items()}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshot.db"))
+    store.upsert("contacts", [
+        contact(1, "alice@example.com", "10", created=JAN_2021),
+        contact(2, "bob@example.com", "9", created=JUN_2021),
+        contact(3, "carol_x@acme.io", "100.5", created=JAN_2022),
+        contact(4, "dave%@acme.io", "abc", created=JUN_2021),
+        contact(5, "erin@example.com", created=JAN_2022)
+    ])
+    store.finish("contacts")
+    return store
+
+
+def search(store, *filters, **body):
+    body.setdefault("properties", ["email"])
+    if filters:
+        body["filterGroups"] = [{"filters": list(filters)}]
+    return [record["id"] for record in store.search("contacts", body)["results"]]
+
+
+def test_upsert_skips_unchanged_records_and_finish_prunes_unseen_ones(store):
+    assert store.upsert("contacts", [contact(1, "alice@example.com", "10"), contact(2, "bob@example.com", "9")]) == 0
+    assert store.upsert("contacts", [contact(2, "bob@new.com", "9", modified=JAN_2022)]) == 1
+    assert store.finish("contacts") == 2
+    assert search(store) == ["1", "2"]
+    assert search(store, {"propertyName": "email", "operator": "EQ", "value": "bob@new.com"}) == ["2"]
+    with pytest.raises(UnsupportedQuery):
+        store.read("contacts", ["3"])
+
+
+@pytest.mark.parametrize("f, expected", [
+    ({"operator": "EQ", "value": "10.0"}, ["1"]),
+    ({"operator": "NEQ", "value": 10}, ["2", "3", "4", "5"]),
+    ({"operator": "LT", "value": "10"}, ["2"]),
+    ({"operator": "LTE", "value": "10"}, ["1", "2"]),
+    # "abc" is not a number and compares as text, after the digits
+    ({"operator": "GT", "value": "9"}, ["1", "3", "4"]),
+    ({"operator": "GTE", "value": 100.5}, ["3", "4"]),
+    ({"operator": "BETWEEN", "value": "9.5", "highValue": "100"}, ["1"]),
+    ({"operator": "IN", "values": ["10.0", "ABC"]}, ["1", "4"]),
+    ({"operator": "NOT_IN", "values": [9, "100.50"]}, ["1", "4", "5"]),
+    ({"operator": "HAS_PROPERTY"}, ["1", "2", "3", "4"]),
+    ({"operator": "NOT_HAS_PROPERTY"}, ["5"])
+])
+def test_operators_compare_numbers_numerically_and_other_values_as_text(store, f, expected):
+    assert search(store, dict(f, propertyName="amount")) == expected
+
+
+def test_text_compares_case_insensitively(store):
+    assert search(store, {"propertyName": "email", "operator": "EQ", "value": "ALICE@example.com"}) == ["1"]
+    assert search(store, {"propertyName": "email", "operator": "LT", "value": "c"}) == ["1", "2"]
+
+
+def test_dates_compare_with_iso_values(store):
+    assert search(store, {"propertyName": "createdate", "operator": "GTE", "value": "2021-06-01"}) == ["2", "3", "4", "5"]
+    assert search(store, {"propertyName": "createdate", "operator": "BETWEEN",
+                          "value": "2021-05-31T23:00:00-01:00", "highValue": "2021-12-31T23:59:59Z"}) == ["2", "4"]
+    assert search(store, {"propertyName": "createdate", "operator": "EQ", "value": "2022-01-01T00:00:00.000Z"}) == ["3", "5"]
+
+
+def test_contains_token_matches_sql_wildcards_literally(store):
+    assert search(store, {"propertyName": "email", "operator": "CONTAINS_TOKEN", "value": "acme"}) == ["3", "4"]
+    assert search(store, {"propertyName": "email", "operator": "CONTAINS_TOKEN", "value": "_"}) == ["3"]
+    assert search(store, {"propertyName": "email", "operator": "CONTAINS_TOKEN", "value": "%"}) == ["4"]
+    assert search(store, {"propertyName": "email", "operator": "CONTAINS_TOKEN", "value": "*x@*"}) == ["3"]
+    assert search(store, {"propertyName": "email", "operator": "NOT_CONTAINS_TOKEN", "value": "example"}) == ["3", "4"]
+
+
+def test_filter_groups_are_ored(store):
+    body = {"properties": ["email"], "filterGroups": [
+        {"filters": [{"propertyName": "amount", "operator": "EQ", "value": "9"}]},
+        {"filters": [{"propertyName": "email", "operator": "CONTAINS_TOKEN", "value": "erin"}]}
+    ]}
+    assert [r["id"] for r in store.search("contacts", body)["results"]] == ["2", "5"]
+
+
+def test_sorts_order_numbers_numerically(store):
+    sort = lambda direction: search(store, {"propertyName": "amount", "operator": "LT", "value": "1000"},
+                                    sorts=[{"propertyName": "amount", "direction": direction}])
+    assert sort("ASCENDING") == ["2", "1", "3"]
+    assert sort("DESCENDING") == ["3", "1", "2"]
+    assert search(store, sorts=[{"propertyName": "createdate", "direction": "DESCENDING"}]) == ["3", "5", "2", "4", "1"]
+
+
+def test_pages_continue_with_snapshot_cursors(store):
+    first = store.search("contacts", {"properties": ["email"], "limit": 2})
+    assert [r["id"] for r in first["results"]] == ["1", "2"]
+    after = first["paging"]["next"]["after"]
+    assert after.startswith(CURSOR_PREFIX)
+    second = store.search("contacts", {"properties": ["email"], "limit": 2, "after": after})
+    third = store.search("contacts", {"properties": ["email"], "limit": 2, "after": second["paging"]["next"]["after"]})
+    assert [r["id"] for r in second["results"] + third["results"]] == ["3", "4", "5"]
+    assert third["paging"] == {}
+
+
+def test_default_properties_and_dates_are_returned_like_the_live_api(store):
+    record = store.read("contacts", [3])["results"][0]
+    assert set(record["properties"]) == {"createdate", "email", "firstname", "hs_object_id", "lastmodifieddate", "lastname"}
+    assert record["properties"]["createdate"] == "2022-01-01T00:00:00.000Z"
+    assert record["properties"]["hs_object_id"] == "3"
+    assert record["createdAt"] == "2022-01-01T00:00:00.000Z"
+    assert store.search("contacts", {"properties": ["amount"], "limit": 1})["results"][0]["properties"] == {"amount": "10"}
+
+
+@pytest.mark.parametrize("body", [
+    {"query": "alice"},
+    {"properties": ["phone"]},
+    {"filterGroups": [{"filters": [{"propertyName": "phone", "operator": "HAS_PROPERTY"}]}]},
+    {"sorts": [{"propertyName": "phone"}]},
+    {"after": "MTAw"},
+    {"filterGroups": [{"filters": [{"propertyName": "email", "operator": "EQ"}]}]}
+])
+def test_unsupported_searches_raise(store, body):
+    with pytest.raises(UnsupportedQuery):
+        store.search("contacts", body)
+
+
+def test_missing_default_properties_fall_back(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshot.db"))
+    store.upsert("contacts", [{"vid": 1, "properties": {"email": {"value": "a@b.c"}}}])
+    store.finish("contacts")
+    assert store.search("contacts", {"properties": ["email"]})["results"][0]["properties"] == {"email": "a@b.c"}
+    with pytest.raises(UnsupportedQuery):
+        store.search("contacts", {})
+    with pytest.raises(UnsupportedQuery):
+        store.read("contacts", [1])
+
+
+def test_query_snapshot_returns_none_when_the_live_api_is_needed(store):
+    ok = lambda: store.search("contacts", {"properties": ["email"]})
+    assert query_snapshot(store, 60, "contacts", ok)["snapshot"]["source"] == "snapshot"
+    assert query_snapshot(store, 60, "contacts", lambda: store.search("contacts", {"query": "x"})) is None
+    assert query_snapshot(store, 60, "companies", ok) is None
+    assert query_snapshot(None, 60, "contacts", ok) is None
+    store._connection().execute("UPDATE snapshots SET refreshed_at = ?", (time.time() - 3600,))
+    assert query_snapshot(store, 30, "contacts", ok) is None
+
+
+def test_live_cursors_are_rejected_in_both_directions():
+    check_live_cursor("MTAw")
+    with pytest.raises(ValueError):
+        check_live_cursor(CURSOR_PREFIX + "10")
+
+
+def test_arun_snapshot_runs_the_lookup_off_the_loop(store):
+    loop = asyncio.new_event_loop()
+    try:
+        lookup = lambda ids: store.read("contacts", ids, ["email"])
+        result = loop.run_until_complete(arun_snapshot(store, lookup, [2]))
+        assert result["results"][0]["properties"] == {"email": "bob@example.com"}
+        assert loop.run_until_complete(arun_snapshot(None, lookup, [2])) is None
+    finally:
+        loop.close()